@@ -4,27 +4,39 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager
+from app.database import RoutingSession, configure_read_pool, install_pragmas
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 login_manager = LoginManager()
 login_manager.login_view = 'main.login'
 
-def create_app():
+def create_app(config_overrides=None):
     app = Flask(__name__)
     app.config.from_object('config.Config')
+    if config_overrides:
+        app.config.update(config_overrides)
 
+    configure_read_pool(app)
     db.init_app(app)
+    install_pragmas(app, db)
     migrate.init_app(app, db)
     login_manager.init_app(app)
 
     from app.routes import main
     app.register_blueprint(main)
 
-    from app.models import User
+    # Session users come from a per-worker cache instead of a query per request
+    from app.auth import user_cache, load_user
+    user_cache.configure(app.config['USER_CACHE_TTL'], app.config['USER_CACHE_SIZE'])
+    login_manager.user_loader(load_user)
 
-    @login_manager.user_loader
-    def load_user(user_id):
-        return User.query.get(int(user_id))
+    from app.respondents import respondent_cache
+    respondent_cache.configure(app.config['RESPONDENT_CACHE_TTL'], app.config['RESPONDENT_CACHE_SIZE'])
+
+    # Load pinned clustering models once per worker, not on the first request
+    from app.model_registry import load_pinned_models
+    with app.app_context():
+        load_pinned_models()
 
     return app
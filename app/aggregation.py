@@ -0,0 +1,55 @@
+# app/aggregation.py
+
+from collections import Counter
+from sqlalchemy import func
+from app import db
+from app.models import KKProfile, KKDemographics
+from app.profile_schema import AGE_GROUPS
+
+
+def _ordered(counter):
+    # Same order GROUP BY gives: NULL first, then ascending
+    return sorted(counter.items(), key=lambda item: (item[0] is not None, item[0]))
+
+
+def dashboard_counts():
+    """Count every dashboard dimension in one scan per table.
+
+    kk_profile is grouped once by (Barangay, sex, age group) and
+    kk_demographics once by (education, work status). The per-dimension
+    totals are then folded from those group rows, so the Python side only
+    touches one row per distinct combination, never one per respondent.
+    Returns ``{dimension: [(label, count), ...]}``.
+    """
+    profile_groups = db.session.query(
+        KKProfile.Barangay,
+        KKProfile.Sex_Assigned_by_Birth,
+        KKProfile.age_bucket,
+        func.count(KKProfile.Respondent_No)
+    ).group_by(KKProfile.Barangay, KKProfile.Sex_Assigned_by_Birth, KKProfile.age_bucket).all()
+
+    demographic_groups = db.session.query(
+        KKDemographics.Educational_Background,
+        KKDemographics.Work_Status,
+        func.count(KKDemographics.Respondent_No)
+    ).group_by(KKDemographics.Educational_Background, KKDemographics.Work_Status).all()
+
+    barangays, sexes, ages = Counter(), Counter(), Counter()
+    for barangay, sex, group, count in profile_groups:
+        barangays[barangay] += count
+        sexes[sex] += count
+        if group is not None:
+            ages[group] += count
+
+    educations, work_statuses = Counter(), Counter()
+    for education, work_status, count in demographic_groups:
+        educations[education] += count
+        work_statuses[work_status] += count
+
+    return {
+        'barangay': _ordered(barangays),
+        'sex': _ordered(sexes),
+        'age_group': [(group, ages[group]) for group in AGE_GROUPS],
+        'education': _ordered(educations),
+        'work_status': _ordered(work_statuses),
+    }
@@ -0,0 +1,77 @@
+# app/auth.py
+
+from itertools import chain
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.cache import TTLCache
+from app.models import User
+
+# Session users loaded by this worker, keyed by id (TTL and size are set
+# from USER_CACHE_TTL / USER_CACHE_SIZE in create_app)
+user_cache = TTLCache()
+
+# Cached for ids that have no user, so a cookie left over from a deleted
+# account does not cost a query on every request
+_NO_USER = object()
+
+# session.info key of the user ids written in the current transaction
+_CHANGED_USERS = 'changed_user_ids'
+
+
+class SessionUser(UserMixin):
+    """current_user between logins: id and username only, no password hash
+    and no tie to a database session, so it can be shared across requests."""
+
+    def __init__(self, id, username):
+        self.id = id
+        self.username = username
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.username)
+
+    def __repr__(self):
+        return f"<SessionUser {self.username}>"
+
+
+def load_user(user_id):
+    """Flask-Login user loader; queries only on a cache miss."""
+    try:
+        key = int(user_id)
+    except ValueError:
+        return None
+    user = user_cache.get(key)
+    if user is None:
+        row = db.session.query(User.id, User.username).filter(User.id == key).first()
+        user = SessionUser(row.id, row.username) if row else _NO_USER
+        user_cache.set(key, user)
+    return None if user is _NO_USER else user
+
+
+def remember_user(user):
+    # Called on login, so the requests right after it are already cache hits
+    user_cache.set(user.id, SessionUser.from_user(user))
+
+
+# Invalidation: users added, changed (e.g. set_password) or deleted through
+# the ORM are evicted once the transaction commits. Bulk Query.update() and
+# raw SQL skip these events; other workers pick the change up when their
+# entry expires.
+@event.listens_for(Session, 'after_flush')
+def _note_user_changes(session, flush_context):
+    ids = {obj.id for obj in chain(session.new, session.dirty, session.deleted) if isinstance(obj, User)}
+    if ids:
+        session.info.setdefault(_CHANGED_USERS, set()).update(ids)
+
+
+@event.listens_for(Session, 'after_commit')
+def _evict_changed_users(session):
+    for user_id in session.info.pop(_CHANGED_USERS, ()):
+        user_cache.pop(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changed_users(session):
+    session.info.pop(_CHANGED_USERS, None)
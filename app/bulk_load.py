@@ -0,0 +1,218 @@
+# app/bulk_load.py
+
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from app.sql_dump import created_table, iter_statements, translate
+
+# Pragmas for the duration of a bulk load. WAL with synchronous=NORMAL keeps
+# every committed batch safe from a crash of the loader while skipping most
+# fsyncs; the page cache is 256 MiB (negative values are KiB) and sort/temp
+# b-trees for index builds stay in memory.
+BULK_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -262144,
+    'temp_store': 'MEMORY',
+}
+
+# One row per dump file of the current load; a file is resumed from the
+# statement/row stored here when its size and mtime have not changed
+PROGRESS_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS bulk_load_progress (
+        source TEXT NOT NULL PRIMARY KEY,
+        fingerprint TEXT NOT NULL,
+        statement INTEGER NOT NULL DEFAULT 0,
+        row INTEGER NOT NULL DEFAULT 0,
+        rows_loaded INTEGER NOT NULL DEFAULT 0,
+        done INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    # Secondary indexes dropped for the load, kept until they are rebuilt
+    # (or until the dump recreates their table)
+    """
+    CREATE TABLE IF NOT EXISTS bulk_load_indexes (
+        name TEXT NOT NULL PRIMARY KEY,
+        tbl_name TEXT NOT NULL,
+        sql TEXT NOT NULL
+    )
+    """,
+]
+
+
+def connect(db_path):
+    # No implicit transactions: the loader issues BEGIN/COMMIT itself
+    return sqlite3.connect(db_path, isolation_level=None)
+
+
+@contextmanager
+def bulk_pragmas(conn, pragmas=BULK_PRAGMAS):
+    """Apply ``pragmas`` and restore the previous values afterwards."""
+    previous = {name: conn.execute(f"PRAGMA {name}").fetchone()[0] for name in pragmas}
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+
+
+def drop_secondary_indexes(conn, tables):
+    """Drop the explicit indexes on ``tables``, remembering how to rebuild them.
+
+    Primary key and UNIQUE constraint indexes (sql IS NULL) stay, as
+    they are part of the table definition.
+    """
+    placeholders = ', '.join('?' * len(tables))
+    indexes = conn.execute(
+        f"SELECT name, tbl_name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+        f"AND tbl_name IN ({placeholders})", list(tables)
+    ).fetchall()
+    conn.execute("BEGIN")
+    for name, table, sql in indexes:
+        conn.execute("INSERT OR REPLACE INTO bulk_load_indexes (name, tbl_name, sql) VALUES (?, ?, ?)",
+                     (name, table, sql))
+        conn.execute(f'DROP INDEX "{name}"')
+    conn.execute("COMMIT")
+    return [name for name, _, _ in indexes]
+
+
+def rebuild_indexes(conn, log=print):
+    """Recreate the indexes recorded by drop_secondary_indexes.
+
+    Indexes of tables the dump recreated are no longer recorded by then:
+    the dump adds its own keys, and refresh_derived_data the app's indexes.
+    """
+    rebuilt = []
+    for name, sql in conn.execute("SELECT name, sql FROM bulk_load_indexes").fetchall():
+        sql = re.sub(r'^\s*CREATE\s+(UNIQUE\s+)?INDEX\s+(?!IF\s+NOT\s+EXISTS)',
+                     lambda m: f"CREATE {m.group(1) or ''}INDEX IF NOT EXISTS ", sql, flags=re.I)
+        try:
+            conn.execute(sql)
+        except sqlite3.Error as e:
+            # e.g. the reloaded table no longer has the indexed column
+            log(f"Could not rebuild index {name}: {e}")
+        else:
+            rebuilt.append(name)
+        conn.execute("DELETE FROM bulk_load_indexes WHERE name = ?", (name,))
+    return rebuilt
+
+
+def _fingerprint(path):
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _save_progress(conn, source, statement, row, rows_loaded, done=0):
+    conn.execute(
+        "UPDATE bulk_load_progress SET statement = ?, row = ?, rows_loaded = ?, done = ? WHERE source = ?",
+        (statement, row, rows_loaded, done, source)
+    )
+
+
+def load_file(conn, path, batch_size=5000, log=print):
+    """Load one dump file, committing every ``batch_size`` rows.
+
+    Each commit also records how far the load got, so after a failure the
+    next call for the same, unchanged file continues from the last commit.
+    Returns the number of rows loaded by this call.
+    """
+    source = os.path.abspath(path)
+    fingerprint = _fingerprint(path)
+    progress = conn.execute(
+        "SELECT fingerprint, statement, row, rows_loaded, done FROM bulk_load_progress WHERE source = ?",
+        (source,)
+    ).fetchone()
+    if progress is None or progress[0] != fingerprint:
+        conn.execute("INSERT OR REPLACE INTO bulk_load_progress (source, fingerprint) VALUES (?, ?)",
+                     (source, fingerprint))
+        progress = (fingerprint, 0, 0, 0, 0)
+    _, resume_statement, resume_row, rows_loaded, done = progress
+    if done:
+        log(f"{path}: already loaded ({rows_loaded} rows), skipping")
+        return 0
+    if resume_statement or resume_row:
+        log(f"{path}: resuming at statement {resume_statement}, row {resume_row}")
+
+    started = time.perf_counter()
+    loaded = pending = 0
+    number = resume_statement - 1
+    cursor = conn.cursor()
+    conn.execute("BEGIN")
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for number, statement in enumerate(iter_statements(f)):
+                if number < resume_statement:
+                    continue
+                skip = resume_row if number == resume_statement else 0
+                for sql, rows in translate(statement):
+                    if rows is None:
+                        cursor.execute(sql)
+                        table = created_table(sql)
+                        if table:
+                            # Same transaction as the CREATE, so a resumed load agrees
+                            cursor.execute("DELETE FROM bulk_load_indexes WHERE tbl_name = ?", (table,))
+                        continue
+                    for start in range(skip, len(rows), batch_size):
+                        batch = rows[start:start + batch_size]
+                        cursor.executemany(sql, batch)
+                        loaded += len(batch)
+                        pending += len(batch)
+                        if pending >= batch_size:
+                            _save_progress(conn, source, number, start + len(batch), rows_loaded + loaded)
+                            conn.execute("COMMIT")
+                            conn.execute("BEGIN")
+                            pending = 0
+                _save_progress(conn, source, number + 1, 0, rows_loaded + loaded)
+        _save_progress(conn, source, number + 1, 0, rows_loaded + loaded, done=1)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+    elapsed = time.perf_counter() - started
+    rate = loaded / elapsed if elapsed else loaded
+    log(f"{path}: {loaded} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+    return loaded
+
+
+def bulk_load(db_path, paths, tables, batch_size=5000, log=print):
+    """Load dump files into ``db_path`` in bulk-load mode.
+
+    Sets BULK_PRAGMAS, drops the secondary indexes of ``tables``, loads
+    each file in committed batches, then rebuilds the indexes, checkpoints
+    the WAL and runs ANALYZE. A rerun after a failure skips what was
+    already committed. Returns the total rows loaded.
+    """
+    conn = connect(db_path)
+    started = time.perf_counter()
+    total = 0
+    try:
+        with bulk_pragmas(conn):
+            for statement in PROGRESS_DDL:
+                conn.execute(statement)
+            dropped = drop_secondary_indexes(conn, tables)
+            if dropped:
+                log(f"Dropped {len(dropped)} secondary indexes for the load")
+            for path in paths:
+                total += load_file(conn, path, batch_size=batch_size, log=log)
+
+            index_started = time.perf_counter()
+            rebuilt = rebuild_indexes(conn, log=log)
+            if rebuilt:
+                log(f"Rebuilt {len(rebuilt)} indexes in {time.perf_counter() - index_started:.2f}s")
+            # Everything is in: forget the progress and fold the WAL back in
+            conn.execute("DELETE FROM bulk_load_progress")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    rate = total / elapsed if elapsed else total
+    log(f"Bulk load: {total} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec overall)")
+    return total
@@ -0,0 +1,335 @@
+# app/clustering.py
+
+import random
+from flask import current_app
+from sklearn.cluster import KMeans
+from app.metrics import silhouette, linear_metrics
+from app.recommendations import get_intelligent_recommendation
+from app import db
+from app.incremental import model_version, predict_labels
+from app.model_selection import select_k
+from app.model_registry import MODEL_KINDS, get_pinned, pinned_version, save_model
+from app.data_version import data_fingerprint
+from app.features import (
+    EVENT_FEATURES, SDG_FEATURES,
+    load_feature_frame, cluster_sizes, cluster_means, cluster_modes, cluster_first, cluster_bins
+)
+
+# Identifies how the feature matrices are built; bump it when that changes
+# so cached results computed from the old features are not served
+FEATURE_SET = 'sdg-v1'
+
+EVENT_COLORS = ["rgba(54, 162, 235, 0.7)", "rgba(255, 99, 132, 0.7)", "rgba(255, 206, 86, 0.7)"]
+SUPPORT_COLORS = ["rgba(255, 99, 132, 0.7)", "rgba(255, 206, 86, 0.7)", "rgba(75, 192, 192, 0.7)"]
+
+
+def clustering_params(config, use_pinned=True):
+    """Everything besides the data that determines a clustering result."""
+    params = {
+        'mode': config['CLUSTERING_MODE'],
+        'n_clusters': config['CLUSTERING_N_CLUSTERS'],
+        'seed': config['CLUSTERING_SEED'],
+        'feature_set': FEATURE_SET,
+        'silhouette_mode': config['CLUSTERING_SILHOUETTE_MODE'],
+        'silhouette_sample_size': config['CLUSTERING_SILHOUETTE_SAMPLE_SIZE'],
+        'silhouette_repeats': config['CLUSTERING_SILHOUETTE_REPEATS'],
+        'chart_max_points': config['CLUSTERING_CHART_MAX_POINTS'],
+    }
+    pinned = {kind: pinned_version(kind) for kind in MODEL_KINDS} if use_pinned else {}
+    if pinned and all(pinned.values()):
+        # Pinned models take precedence over fitting; results depend on them
+        params['pinned'] = pinned
+    elif params['mode'] == 'incremental':
+        # Results depend on the persisted centroids, not only on the data
+        params['model_version'] = model_version()
+    elif config['CLUSTERING_AUTO_K']:
+        low, high = config['CLUSTERING_K_RANGE']
+        params['k_values'] = list(range(low, high + 1))
+        params['k_jobs'] = config['CLUSTERING_K_JOBS']
+    return params
+
+
+def _silhouette_options(params):
+    return {
+        'mode': params['silhouette_mode'],
+        'sample_size': params['silhouette_sample_size'],
+        'repeats': params['silhouette_repeats'],
+    }
+
+
+def _silhouette(X, labels, params):
+    return silhouette(X, labels, seed=params['seed'], **_silhouette_options(params))
+
+
+def _load_pinned(versions):
+    """The pinned ``(version, model, encoders)`` of each kind, or None if a
+    pin no longer matches ``versions`` or its files cannot be loaded."""
+    loaded = {}
+    for kind in MODEL_KINDS:
+        try:
+            pinned = get_pinned(kind)
+        except (OSError, ValueError) as e:
+            current_app.logger.warning('Could not load pinned %s model: %s', kind, e)
+            return None
+        if pinned is None or pinned[0] != versions[kind]:
+            return None
+        loaded[kind] = pinned
+    return loaded
+
+
+def compute_clustering(params, save_models=False):
+    """Run both clusterings and return the clustering_model template context.
+
+    The result only contains plain lists, dicts and numbers so it can be
+    stored as JSON. With ``save_models`` the fitted models are also added
+    to the registry (manage_models.py save); requests never write to it.
+    """
+    # 1-2. Fetch the joined columns and build the SDG feature matrices
+    frame = load_feature_frame()
+    X = frame.event_matrix()
+    sdg_features = frame.sdg_matrix()
+
+    # 3. Run KMeans clustering for event recommendation
+    # A fixed seed makes every run (and so every cached result) reproducible
+    n_clusters = params['n_clusters']
+    seed = params['seed']
+    rng = random.Random(seed)
+    n_event = n_support = n_clusters
+    event_model = support_model = None
+    k_sweep_event = k_sweep_support = None
+
+    # Pinned models that went away since the params were built fall back to fitting
+    pinned = _load_pinned(params['pinned']) if params.get('pinned') else None
+
+    predicted = None
+    if params['mode'] == 'incremental' and pinned is None:
+        # Assign from the persisted mini-batch centroids instead of refitting;
+        # until update_clusters.py has fitted them, fit in memory like full mode
+        predicted = predict_labels(frame, n_clusters)
+        if predicted is None:
+            current_app.logger.warning('No incremental models for k=%s; run update_clusters.py', n_clusters)
+
+    if pinned is not None:
+        # Serve assignments from the pinned registry models, no refitting
+        _, event_model, event_encoders = pinned['event']
+        _, support_model, _ = pinned['support']
+        labels = event_model.predict(frame.event_matrix(event_encoders))
+        labels2 = support_model.predict(sdg_features)
+        n_event, n_support = event_model.n_clusters, support_model.n_clusters
+    elif predicted is not None:
+        labels, labels2 = predicted
+    elif params.get('k_values'):
+        # Sweep k for both models at once and keep the best of each
+        selected = select_k(
+            {'event': X, 'support': sdg_features}, params['k_values'], seed,
+            _silhouette_options(params), n_jobs=params['k_jobs']
+        )
+        event_model, k_sweep_event = selected['event']
+        support_model, k_sweep_support = selected['support']
+        labels, labels2 = event_model.labels_, support_model.labels_
+        n_event, n_support = event_model.n_clusters, support_model.n_clusters
+    else:
+        event_model = KMeans(n_clusters=n_clusters, random_state=seed, n_init=10).fit(X)
+        support_model = KMeans(n_clusters=n_clusters, random_state=seed, n_init=10).fit(sdg_features)
+        labels, labels2 = event_model.labels_, support_model.labels_
+
+    silhouette_event = _silhouette(X, labels, params)
+    
+    # Additional clustering metrics for better analysis
+    calinski_event, davies_event = linear_metrics(X, labels)
+
+    # --- Youth Needs Support with SDG Focus ---
+    # SDG-focused cluster labels
+    sdg_support_labels = ['SDG Priority Group', 'SDG Development Group', 'SDG Empowerment Group']
+    # With more clusters than names, number them so no two share a label
+    numbered = n_support > len(sdg_support_labels)
+    support_names = [
+        sdg_support_labels[i % len(sdg_support_labels)] + (f" {i + 1}" if numbered else '')
+        for i in range(n_support)
+    ]
+    needs_support_groups = []
+
+    # Per-cluster statistics, each a single grouped reduction over all rows
+    support_counts = cluster_sizes(labels2, n_support)
+    support_poverty = cluster_means(labels2, frame.poverty_indicator, n_support)   # SDG 1
+    support_education = cluster_means(labels2, frame.education_level, n_support)   # SDG 4
+    support_gender = cluster_means(labels2, frame.gender_empowerment, n_support)   # SDG 5
+    support_economic = cluster_means(labels2, frame.economic_participation, n_support)  # SDG 8
+    support_top_education = cluster_modes(labels2, frame.education, n_support)
+    support_top_work = cluster_modes(labels2, frame.work_status, n_support)
+    
+    for i in range(n_support):
+        avg_poverty = support_poverty[i]
+        avg_education = support_education[i]
+        avg_gender_emp = support_gender[i]
+        avg_economic = support_economic[i]
+        
+        # Determine primary SDG focus for this cluster
+        sdg_focus = []
+        if avg_poverty < 0.5:
+            sdg_focus.append("SDG 1: Poverty Alleviation")
+        if avg_education < 2:
+            sdg_focus.append("SDG 4: Quality Education")
+        if avg_gender_emp < 0.5:
+            sdg_focus.append("SDG 5: Gender Equality")
+        if avg_economic < 1.5:
+            sdg_focus.append("SDG 8: Decent Work")
+        
+        primary_sdg = sdg_focus[0] if sdg_focus else "SDG 17: Partnerships"
+        
+        needs_support_groups.append({
+            "label": f"{support_names[i]} ({primary_sdg})",
+            "count": int(support_counts[i]),
+            "avg_participation": float(round(avg_economic, 2)),
+            "common_education": support_top_education[i] or '-',
+            "common_employment": support_top_work[i] or '-',
+            "sdg_focus": primary_sdg
+        })
+    
+    # One weighted point per distinct coordinate, not one per respondent,
+    # so the payload does not grow with the population
+    support_bins = cluster_bins(labels2, sdg_features[:, :2], n_support, params['chart_max_points'])
+    needs_support_chart_data = {
+        "datasets": [
+            {
+                "label": support_names[i],
+                "data": support_bins[i],
+                "backgroundColor": SUPPORT_COLORS[i % len(SUPPORT_COLORS)]
+            }
+            for i in range(n_support)
+        ]
+    }
+    silhouette_support = _silhouette(sdg_features, labels2, params)
+    
+    # Additional clustering metrics for needs support
+    calinski_support, davies_support = linear_metrics(sdg_features, labels2)
+
+    if save_models:
+        # Keep the freshly fitted models so they can be pinned later
+        fingerprint = data_fingerprint(db.session.connection())
+        save_model('event', event_model, frame.encoders(), EVENT_FEATURES, seed, {
+            'silhouette': silhouette_event, 'calinski_harabasz': calinski_event, 'davies_bouldin': davies_event
+        }, fingerprint)
+        save_model('support', support_model, None, SDG_FEATURES, seed, {
+            'silhouette': silhouette_support, 'calinski_harabasz': calinski_support, 'davies_bouldin': davies_support
+        }, fingerprint)
+
+    # 4. Prepare cluster summaries and chart data for the template
+    event_counts = cluster_sizes(labels, n_event)
+    event_avg_age = cluster_means(labels, frame.age, n_event, mask=frame.valid_age)
+    event_poverty = cluster_means(labels, frame.poverty_indicator, n_event)
+    event_education = cluster_means(labels, frame.education_level, n_event)
+    event_gender = cluster_means(labels, frame.gender_empowerment, n_event)
+    event_economic = cluster_means(labels, frame.economic_participation, n_event)
+    event_civic = cluster_means(labels, frame.civic_engagement, n_event)
+    event_attended = cluster_means(labels, frame.attended, n_event)
+    event_voted = cluster_means(labels, frame.voted, n_event)
+    event_top_sex = cluster_modes(labels, frame.sex, n_event)
+    event_top_education = cluster_modes(labels, frame.education, n_event)
+    event_top_work = cluster_modes(labels, frame.work_status, n_event)
+    event_first_education = cluster_first(labels, frame.education, n_event)
+    event_first_work = cluster_first(labels, frame.work_status, n_event)
+
+    event_clusters = []
+    for i in range(n_event):
+        avg_age = event_avg_age[i]
+        
+        # SDG-focused demographic analysis
+        poverty_rate = event_poverty[i]
+        education_level = event_education[i]
+        gender_balance = event_gender[i]
+        economic_participation = event_economic[i]
+        civic_engagement = event_civic[i]
+        
+        # Determine primary SDG focus for recommendations
+        sdg_priorities = []
+        if poverty_rate < 0.5:
+            sdg_priorities.append("SDG 1")
+        if education_level < 2:
+            sdg_priorities.append("SDG 4")
+        if gender_balance < 0.5:
+            sdg_priorities.append("SDG 5")
+        if economic_participation < 1.5:
+            sdg_priorities.append("SDG 8")
+        if civic_engagement < 1:
+            sdg_priorities.append("SDG 16")
+        
+        # Demographic modes
+        top_sex = event_top_sex[i] or '-'
+        top_education = event_top_education[i] or 'Unknown'
+        top_work = event_top_work[i] or 'Unknown'
+        
+        # Calculate engagement level
+        engagement_level = event_attended[i] + event_voted[i]
+        
+        # Determine age group
+        if avg_age < 18:
+            age_group = 'Teen'
+        elif avg_age < 25:
+            age_group = 'Young Adult'
+        else:
+            age_group = 'Adult'
+        
+        # Intelligent recommendation logic with SDG focus
+        recommended_event = get_intelligent_recommendation(
+            top_education, top_work, top_sex, age_group, engagement_level, avg_age, rng=rng
+        )
+        
+        # Create detailed demographic summary with SDG indicators
+        demo_summary = f"Avg Age: {avg_age:.1f} • {top_sex}"
+        if event_first_education[i]:
+            demo_summary += f" • {event_first_education[i]}"
+        if event_first_work[i]:
+            demo_summary += f" • {event_first_work[i]}"
+        
+        # Add SDG focus to summary
+        if sdg_priorities:
+            demo_summary += f" • Focus: {', '.join(sdg_priorities[:2])}"
+        
+        # Dynamic cluster labels based on SDG characteristics
+        if engagement_level > 1.5 and education_level > 2:
+            label = rng.choice(["SDG Leadership Circle", "SDG Innovation Group", "SDG Empowerment Network"])
+        elif poverty_rate < 0.5 and education_level < 2:
+            label = rng.choice(["SDG Development Cluster", "SDG Support Network", "SDG Growth Initiative"])
+        else:
+            label = rng.choice(["SDG Community Group", "SDG Opportunity Circle", "SDG Partnership Network"])
+        
+        event_clusters.append({
+            "label": label,
+            "count": int(event_counts[i]),
+            "top_demo": demo_summary,
+            "top_engagement": f"Economic: {economic_participation:.1f} • Civic: {civic_engagement:.1f}",
+            "recommended_event": recommended_event,
+            "avg_age": round(float(avg_age), 1),
+            "engagement_level": round(float(engagement_level), 2),
+            "sdg_focus": ', '.join(sdg_priorities[:3]) if sdg_priorities else "SDG 17"
+        })
+
+    event_bins = cluster_bins(labels, X[:, :2], n_event, params['chart_max_points'])
+    event_cluster_chart_data = {
+        "datasets": [
+            {
+                "label": f"Cluster {i+1}",
+                "data": event_bins[i],
+                "backgroundColor": EVENT_COLORS[i % len(EVENT_COLORS)]
+            }
+            for i in range(n_event)
+        ]
+    }
+
+    return {
+        "event_clusters": event_clusters,
+        "event_cluster_chart_data": event_cluster_chart_data,
+        "needs_support_groups": needs_support_groups,
+        "needs_support_chart_data": needs_support_chart_data,
+        "silhouette_event": silhouette_event['score'] if silhouette_event else None,
+        "silhouette_support": silhouette_support['score'] if silhouette_support else None,
+        "silhouette_event_info": silhouette_event,
+        "silhouette_support_info": silhouette_support,
+        "calinski_event": calinski_event,
+        "davies_event": davies_event,
+        "calinski_support": calinski_support,
+        "davies_support": davies_support,
+        "k_sweep_event": k_sweep_event,
+        "k_sweep_support": k_sweep_support
+    }
@@ -0,0 +1,44 @@
+# app/clustering_cache.py
+
+import hashlib
+import json
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import ClusteringResult
+from app.data_version import data_fingerprint
+
+
+def result_key(fingerprint, params):
+    payload = json.dumps({'data': fingerprint, 'params': params}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def current_key(params):
+    fingerprint = data_fingerprint(db.session.connection())
+    return fingerprint, result_key(fingerprint, params)
+
+
+def get_cached_result(key):
+    """Return the stored clustering result for ``key``, or None."""
+    row = db.session.get(ClusteringResult, key)
+    return json.loads(row.result) if row else None
+
+
+def store_result(fingerprint, key, params, result):
+    # fingerprint and key must be taken before the result is computed: a
+    # write landing during the computation then leaves the result under the
+    # old fingerprint, where it is never served, instead of labelling stale
+    # output as current
+    # Results computed from older data can never be served again
+    ClusteringResult.query.filter(ClusteringResult.fingerprint != fingerprint).delete()
+    db.session.add(ClusteringResult(
+        cache_key=key,
+        fingerprint=fingerprint,
+        params=json.dumps(params, sort_keys=True),
+        result=json.dumps(result)
+    ))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker stored the same result first
+        db.session.rollback()
@@ -0,0 +1,69 @@
+# app/data_version.py
+
+from sqlalchemy import text
+
+VERSIONED_TABLES = ('kk_profile', 'kk_demographics')
+
+# Every write to a versioned table bumps its counter, so comparing counters
+# tells a cache whether the underlying rows changed without reading them
+DATA_VERSION_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS data_version (
+        table_name VARCHAR(50) NOT NULL PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+] + [
+    f"INSERT OR IGNORE INTO data_version (table_name, version) VALUES ('{table}', 0)"
+    for table in VERSIONED_TABLES
+] + [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {table}_version_{suffix} AFTER {event} ON {table} BEGIN
+        UPDATE data_version SET version = version + 1 WHERE table_name = '{table}';
+    END
+    """
+    for table in VERSIONED_TABLES
+    for suffix, event in (('ai', 'INSERT'), ('au', 'UPDATE'), ('ad', 'DELETE'))
+]
+
+DROP_DATA_VERSION_DDL = [
+    f"DROP TRIGGER IF EXISTS {table}_version_{suffix}"
+    for table in VERSIONED_TABLES
+    for suffix in ('ai', 'au', 'ad')
+] + ["DROP TABLE IF EXISTS data_version"]
+
+
+def install_data_version(connection):
+    for statement in DATA_VERSION_DDL:
+        connection.execute(text(statement))
+
+
+def bump_data_version(connection):
+    """Mark every versioned table as changed, e.g. after a bulk reload."""
+    install_data_version(connection)
+    connection.execute(text("UPDATE data_version SET version = version + 1"))
+
+
+def data_fingerprint(connection):
+    """Cheap identifier of the current state of the respondent tables.
+
+    Made of the write counters plus each table's highest rowid, both O(1)
+    lookups, so it can be checked on every request.
+    """
+    parts = [
+        f"{name}:{version}"
+        for name, version in connection.execute(
+            text("SELECT table_name, version FROM data_version ORDER BY table_name")
+        )
+    ]
+    for table in VERSIONED_TABLES:
+        max_rowid = connection.execute(text(f"SELECT MAX(rowid) FROM {table}")).scalar()
+        parts.append(f"{table}.rowid:{max_rowid}")
+    return '|'.join(parts)
+
+
+def table_versions(connection):
+    """Just the write counters, in table order: one read of a tiny table."""
+    return tuple(connection.execute(
+        text("SELECT version FROM data_version ORDER BY table_name")
+    ).scalars())
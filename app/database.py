@@ -0,0 +1,85 @@
+# app/database.py
+
+from functools import wraps
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.dml import UpdateBase
+
+# Bind key of the read pool, a second engine on the same SQLite file
+READER_BIND = 'reader'
+
+
+def _is_sqlite_file(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def configure_read_pool(app):
+    """Add the reader bind for a file-backed SQLite database.
+
+    Call before ``db.init_app``. The default engine stays the single
+    writer (see SQLALCHEMY_ENGINE_OPTIONS); the reader gets its own pool
+    of SQLITE_READ_POOL_SIZE connections on the same file. Other databases
+    are left alone.
+    """
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if not _is_sqlite_file(uri):
+        return
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    size = app.config['SQLITE_READ_POOL_SIZE']
+    binds[READER_BIND] = {'url': uri, 'pool_size': size, 'max_overflow': size}
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+
+def _pragma_listener(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+    return set_pragmas
+
+
+def install_pragmas(app, db):
+    """Run SQLITE_PRAGMAS on every new connection, plus query_only on readers."""
+    pragmas = app.config['SQLITE_PRAGMAS']
+    with app.app_context():
+        engines = db.engines
+    for key, engine in engines.items():
+        if engine.url.get_backend_name() != 'sqlite':
+            continue
+        if key == READER_BIND:
+            # journal_mode is stored in the file; the writer sets it
+            reader_pragmas = {name: value for name, value in pragmas.items() if name != 'journal_mode'}
+            event.listen(engine, 'connect', _pragma_listener({**reader_pragmas, 'query_only': 'ON'}))
+        else:
+            event.listen(engine, 'connect', _pragma_listener(pragmas))
+
+
+def read_only(view):
+    """Serve a view's queries from the read pool.
+
+    Set before the wrapped view (and login_required) run, so the user
+    lookup is a read as well. Only for views that do not write: flushes
+    and ORM insert/update/delete statements still go to the writer, but
+    raw SQL writes cannot be routed and fail on the reader.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_read_only = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+class RoutingSession(Session):
+    """db.session that sends reads in read_only views to the reader bind."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and not isinstance(clause, UpdateBase)
+                and has_app_context() and g.get('db_read_only')):
+            reader = self._db.engines.get(READER_BIND)
+            if reader is not None:
+                return reader
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
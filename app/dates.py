@@ -0,0 +1,101 @@
+# app/dates.py
+
+import re
+from datetime import date, datetime
+from sqlalchemy import text
+
+# kk_profile columns holding dates; the dumps write them as dd/mm/yyyy
+PROFILE_DATE_COLUMNS = ('Date', 'Birthday')
+
+_DMY = re.compile(r'^\s*(\d{1,2})/(\d{1,2})/(\d{4})\s*$')
+_ISO = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+# ISO values are what we write, so a rerun only reads rows still left to fix
+_NOT_ISO = "NOT (IFNULL({column}, '') GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]' OR IFNULL({column}, '') = '')"
+
+DATE_REJECTS_DDL = """
+    CREATE TABLE IF NOT EXISTS date_rejects (
+        Respondent_No VARCHAR(14) NOT NULL,
+        column_name VARCHAR(20) NOT NULL,
+        value TEXT,
+        rejected_at DATETIME NOT NULL,
+        PRIMARY KEY (Respondent_No, column_name)
+    )
+"""
+
+
+def parse_date(value):
+    """ISO ``yyyy-mm-dd`` for a dd/mm/yyyy (or already ISO) value, else None."""
+    if value is None:
+        return None
+    value = str(value)
+    if _ISO.match(value):
+        match = (value[8:10], value[5:7], value[0:4])
+    else:
+        match = _DMY.match(value)
+        if match is None:
+            return None
+        match = match.groups()
+    day, month, year = (int(part) for part in match)
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+def normalize_profile_dates(connection, batch_size=5000):
+    """Rewrite kk_profile Date/Birthday values from dd/mm/yyyy to ISO.
+
+    Only rows with a non-ISO value are read, in batches of ``batch_size``.
+    The parsed values go into a temp table and are applied with a single
+    UPDATE ... FROM, so the whole fix is one statement per run instead of
+    one per row. Values that cannot be parsed are left alone and recorded
+    in date_rejects, which is rewritten on every run. Returns
+    ``(fixed, rejected)`` counts.
+    """
+    connection.execute(text(DATE_REJECTS_DDL))
+    connection.execute(text("DELETE FROM date_rejects"))
+    connection.execute(text("DROP TABLE IF EXISTS temp.date_fixes"))
+    columns = ', '.join(PROFILE_DATE_COLUMNS)
+    connection.execute(text(
+        f"CREATE TEMP TABLE date_fixes (rid INTEGER PRIMARY KEY, {columns})"
+    ))
+
+    pending = ' OR '.join(_NOT_ISO.format(column=column) for column in PROFILE_DATE_COLUMNS)
+    result = connection.execute(text(
+        f"SELECT rowid, Respondent_No, {columns} FROM kk_profile WHERE {pending}"
+    ))
+    now = datetime.utcnow()
+    fixed = rejected = 0
+    while True:
+        rows = result.fetchmany(batch_size)
+        if not rows:
+            break
+        fixes, rejects = [], []
+        for rid, respondent_no, *values in rows:
+            parsed = [parse_date(value) if value not in (None, '') else None for value in values]
+            for column, value, iso in zip(PROFILE_DATE_COLUMNS, values, parsed):
+                if value not in (None, '') and iso is None:
+                    rejects.append({'no': respondent_no, 'column': column, 'value': value, 'at': now})
+            if any(iso is not None and iso != value for iso, value in zip(parsed, values)):
+                fixes.append(dict(zip(('rid',) + PROFILE_DATE_COLUMNS, [rid] + parsed)))
+        if fixes:
+            connection.execute(text(
+                f"INSERT INTO date_fixes (rid, {columns}) VALUES (:rid, :{', :'.join(PROFILE_DATE_COLUMNS)})"
+            ), fixes)
+        if rejects:
+            connection.execute(text(
+                "INSERT OR REPLACE INTO date_rejects (Respondent_No, column_name, value, rejected_at) "
+                "VALUES (:no, :column, :value, :at)"
+            ), rejects)
+        fixed += len(fixes)
+        rejected += len(rejects)
+
+    assignments = ', '.join(
+        f"{column} = COALESCE(date_fixes.{column}, kk_profile.{column})" for column in PROFILE_DATE_COLUMNS
+    )
+    connection.execute(text(
+        f"UPDATE kk_profile SET {assignments} FROM date_fixes WHERE kk_profile.rowid = date_fixes.rid"
+    ))
+    connection.execute(text("DROP TABLE temp.date_fixes"))
+    return fixed, rejected
@@ -0,0 +1,206 @@
+# app/delta_import.py
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from sqlalchemy import text
+from app.dates import PROFILE_DATE_COLUMNS, parse_date
+from app.sql_dump import iter_table_rows
+from app.survey_ingest import upsert
+
+KEY = 'Respondent_No'
+
+# Tables a delta import can apply to, keyed by Respondent_No
+DELTA_TABLES = ('kk_profile', 'kk_demographics')
+
+
+def _age(value):
+    value = str(value).strip()
+    return int(value) if value.isdigit() else None
+
+
+# Columns converted the way retype_profile stores them, before hashing and
+# writing: a dump's dd/mm/yyyy dates and text ages then match the typed rows
+_NORMALIZERS = {
+    'kk_profile': {'Age': _age, **{column: parse_date for column in PROFILE_DATE_COLUMNS}},
+}
+
+# One hash per respondent and table, of the row as last imported. Any other
+# write to the row drops its hash, so the next delta import rewrites it
+# instead of trusting a hash of content that is no longer there.
+ROW_HASH_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS row_hashes (
+        table_name VARCHAR(50) NOT NULL,
+        Respondent_No VARCHAR(14) NOT NULL,
+        hash CHAR(32) NOT NULL,
+        PRIMARY KEY (table_name, Respondent_No)
+    )
+    """,
+    # Change summary of the last delta import, for caches and rollups to read
+    """
+    CREATE TABLE IF NOT EXISTS import_changes (
+        table_name VARCHAR(50) NOT NULL,
+        Respondent_No VARCHAR(14) NOT NULL,
+        change VARCHAR(10) NOT NULL,
+        imported_at DATETIME NOT NULL,
+        PRIMARY KEY (table_name, Respondent_No)
+    )
+    """,
+] + [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {table}_hash_{suffix} AFTER {event} ON {table} BEGIN
+        DELETE FROM row_hashes WHERE table_name = '{table}' AND Respondent_No IN ({rows});
+    END
+    """
+    for table in DELTA_TABLES
+    for suffix, event, rows in (
+        ('ai', 'INSERT', 'new.Respondent_No'),
+        ('au', 'UPDATE', 'old.Respondent_No, new.Respondent_No'),
+        ('ad', 'DELETE', 'old.Respondent_No'),
+    )
+]
+
+DROP_ROW_HASH_DDL = [
+    f"DROP TRIGGER IF EXISTS {table}_hash_{suffix}"
+    for table in DELTA_TABLES
+    for suffix in ('ai', 'au', 'ad')
+] + ["DROP TABLE IF EXISTS import_changes", "DROP TABLE IF EXISTS row_hashes"]
+
+
+def normalize_row(table, columns, values):
+    normalizers = _NORMALIZERS.get(table, {})
+    row = dict(zip(columns, values))
+    for column, normalize in normalizers.items():
+        if column in row:
+            row[column] = normalize(row[column]) if row[column] not in (None, '') else None
+    return row
+
+
+def row_hash(row):
+    """Hash of a row dict that ignores column order and int/str differences."""
+    canonical = sorted((column, None if value is None else str(value)) for column, value in row.items())
+    return hashlib.blake2b(json.dumps(canonical).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def install_row_hashes(connection):
+    for statement in ROW_HASH_DDL:
+        connection.execute(text(statement))
+
+
+def rebuild_row_hashes(connection):
+    """Hash every row currently in DELTA_TABLES.
+
+    Run after a full reload, so the first delta import afterwards only
+    touches rows that really differ from the dump.
+    """
+    install_row_hashes(connection)
+    connection.execute(text("DELETE FROM row_hashes"))
+    for table in DELTA_TABLES:
+        # table_info leaves out generated columns such as age_bucket
+        columns = [row[1] for row in connection.execute(text(f"PRAGMA table_info({table})"))]
+        result = connection.execute(text(
+            f"SELECT {', '.join(columns)} FROM {table} WHERE {KEY} IS NOT NULL"
+        ))
+        hashes = [
+            {'table': table, 'no': row[KEY], 'hash': row_hash(row)}
+            for row in (normalize_row(table, columns, values) for values in result)
+        ]
+        if hashes:
+            connection.execute(text(
+                "INSERT OR REPLACE INTO row_hashes (table_name, Respondent_No, hash) VALUES (:table, :no, :hash)"
+            ), hashes)
+
+
+def _read_dumps(paths, tables):
+    # table -> {Respondent_No: row dict}; a later row for the same respondent wins
+    incoming = {}
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for table, columns, rows in iter_table_rows(f, tables):
+                target = incoming.setdefault(table, {})
+                for values in rows:
+                    row = normalize_row(table, columns, values)
+                    if row.get(KEY) is not None:
+                        row[KEY] = str(row[KEY])
+                        target[row[KEY]] = row
+    return incoming
+
+
+def delta_import(connection, paths, tables=DELTA_TABLES, batch_size=1000):
+    """Apply only what changed between the dumps in ``paths`` and the database.
+
+    Each incoming row is hashed and compared with the stored hash for its
+    respondent: new respondents are inserted, rows whose hash differs (or
+    has none) are updated and respondents missing from the dump are
+    deleted. Tables the dumps do not mention are left alone. The row
+    triggers keep search, rollups, features and data_version current, and
+    the per-respondent changes are written to import_changes.
+
+    Returns ``{table: {'inserted': n, 'updated': n, 'deleted': n, 'unchanged': n}}``.
+    """
+    install_row_hashes(connection)
+    connection.execute(text("DELETE FROM import_changes"))
+    # Stored as ISO 8601 text with its UTC offset
+    now = datetime.now(timezone.utc).isoformat()
+    summary = {}
+    for table, rows in _read_dumps(paths, tables).items():
+        existing = set(connection.execute(text(
+            f"SELECT {KEY} FROM {table} WHERE {KEY} IS NOT NULL"
+        )).scalars())
+        stored = dict(connection.execute(text(
+            "SELECT Respondent_No, hash FROM row_hashes WHERE table_name = :table"
+        ), {'table': table}).all())
+
+        changes, changed_rows, hashes = [], [], []
+        for respondent_no, row in rows.items():
+            digest = row_hash(row)
+            if respondent_no not in existing:
+                change = 'insert'
+            elif stored.get(respondent_no) != digest:
+                change = 'update'
+            else:
+                continue
+            changes.append({'table': table, 'no': respondent_no, 'change': change, 'at': now})
+            changed_rows.append(row)
+            hashes.append({'table': table, 'no': respondent_no, 'hash': digest})
+        deleted = sorted(existing - rows.keys())
+        changes += [{'table': table, 'no': no, 'change': 'delete', 'at': now} for no in deleted]
+
+        for start in range(0, len(deleted), batch_size):
+            batch = deleted[start:start + batch_size]
+            placeholders = ', '.join(f':n{i}' for i in range(len(batch)))
+            connection.execute(
+                text(f"DELETE FROM {table} WHERE {KEY} IN ({placeholders})"),
+                {f'n{i}': no for i, no in enumerate(batch)}
+            )
+        for start in range(0, len(changed_rows), batch_size):
+            upsert(connection, table, changed_rows[start:start + batch_size])
+        # After the writes, whose triggers cleared the old hashes
+        if hashes:
+            connection.execute(text(
+                "INSERT OR REPLACE INTO row_hashes (table_name, Respondent_No, hash) VALUES (:table, :no, :hash)"
+            ), hashes)
+        if changes:
+            connection.execute(text(
+                "INSERT INTO import_changes (table_name, Respondent_No, change, imported_at) "
+                "VALUES (:table, :no, :change, :at)"
+            ), changes)
+
+        inserted = sum(1 for change in changes if change['change'] == 'insert')
+        updated = len(changed_rows) - inserted
+        summary[table] = {
+            'inserted': inserted, 'updated': updated, 'deleted': len(deleted),
+            'unchanged': len(rows) - len(changed_rows),
+        }
+    return summary
+
+
+def read_import_changes(connection):
+    """Changes of the last delta import as ``{table: {change: [Respondent_No, ...]}}``."""
+    changes = {}
+    for table, respondent_no, change in connection.execute(text(
+        "SELECT table_name, Respondent_No, change FROM import_changes ORDER BY table_name, Respondent_No"
+    )):
+        changes.setdefault(table, {}).setdefault(change, []).append(respondent_no)
+    return changes
@@ -0,0 +1,102 @@
+# app/feature_store.py
+
+from sqlalchemy import text
+from app.features import EDUCATION_LEVELS, STORED_FEATURES as FEATURE_COLUMNS
+
+# How each integer column of respondent_features is computed: an SQL expression over the joined kk_profile (p) and
+# kk_demographics (d) rows, matching how the features used to be derived
+# in Python: NULL/'' count as 'Unknown'. Age is a typed INTEGER column
+# (app/profile_schema.py), so a valid age is simply a non-NULL one.
+_VALID_AGE = "(p.Age IS NOT NULL)"
+_ATTENDED = "(d.Attended_KK_Assembly = 'Yes')"
+_VOTED = "(d.Did_you_vote_last_SK_election = 'Yes')"
+_POVERTY = "(IFNULL(d.Work_Status, '') != 'Unemployed')"
+_EDUCATION_LEVEL = "CASE d.Educational_Background {} ELSE 0 END".format(
+    ' '.join(f"WHEN '{value}' THEN {level}" for value, level in EDUCATION_LEVELS.items())
+)
+
+FEATURE_EXPRESSIONS = {
+    'age': "IFNULL(p.Age, 0)",
+    'valid_age': _VALID_AGE,
+    'attended': f"IFNULL({_ATTENDED}, 0)",
+    'voted': f"IFNULL({_VOTED}, 0)",
+    'poverty_indicator': _POVERTY,                                        # SDG 1
+    'education_level': _EDUCATION_LEVEL,                                  # SDG 4
+    'gender_empowerment': "IFNULL(p.Sex_Assigned_by_Birth = 'Female', 0)",  # SDG 5
+    'civic_engagement': f"IFNULL({_ATTENDED}, 0) + IFNULL({_VOTED}, 0)",    # SDG 16
+    'economic_participation': f"IFNULL({_ATTENDED}, 0) + IFNULL({_VOTED}, 0) + {_POVERTY}",  # SDG 8
+}
+
+_SELECT_FEATURES = """
+    SELECT p.Respondent_No, {expressions}
+    FROM kk_profile p JOIN kk_demographics d ON d.Respondent_No = p.Respondent_No
+""".format(expressions=', '.join(FEATURE_EXPRESSIONS[name] for name in FEATURE_COLUMNS))
+
+_UPSERT_FEATURES = f"INSERT OR REPLACE INTO respondent_features (Respondent_No, {', '.join(FEATURE_COLUMNS)})"
+
+# Triggers recompute one respondent's row, so they need to find the
+# other half of the join by Respondent_No without a scan
+FEATURE_INDEX_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_kk_profile_respondent_no ON kk_profile (Respondent_No)",
+    "CREATE INDEX IF NOT EXISTS ix_kk_demographics_respondent_no ON kk_demographics (Respondent_No)",
+]
+
+
+def _triggers(table, columns):
+    refresh_new = f"{_UPSERT_FEATURES} {_SELECT_FEATURES} WHERE p.Respondent_No = new.Respondent_No;"
+    delete_old = "DELETE FROM respondent_features WHERE Respondent_No = old.Respondent_No;"
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_features_ai AFTER INSERT ON {table} BEGIN
+            {refresh_new}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_features_ad AFTER DELETE ON {table} BEGIN
+            {delete_old}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_features_au AFTER UPDATE OF {', '.join(columns)} ON {table} BEGIN
+            {delete_old}
+            {refresh_new}
+        END
+        """,
+    ]
+
+
+FEATURE_STORE_DDL = FEATURE_INDEX_DDL + _triggers(
+    'kk_profile', ['Respondent_No', 'Age', 'Sex_Assigned_by_Birth']
+) + _triggers(
+    'kk_demographics', ['Respondent_No', 'Work_Status', 'Educational_Background',
+                        'Attended_KK_Assembly', 'Did_you_vote_last_SK_election']
+)
+
+DROP_FEATURE_STORE_DDL = [
+    f"DROP TRIGGER IF EXISTS {table}_features_{event}"
+    for table in ('kk_profile', 'kk_demographics')
+    for event in ('ai', 'ad', 'au')
+] + [
+    "DROP INDEX IF EXISTS ix_kk_demographics_respondent_no",
+    "DROP INDEX IF EXISTS ix_kk_profile_respondent_no",
+]
+
+
+def install_feature_store(connection):
+    """Create the maintenance triggers (and the indexes they use) if missing.
+
+    The respondent_features table itself is created by its migration.
+    """
+    for statement in FEATURE_STORE_DDL:
+        connection.execute(text(statement))
+
+
+def rebuild_feature_store(connection):
+    """Recompute every respondent's features from the base tables.
+
+    Only needed after a bulk reload; row-level writes keep the table
+    current through the triggers.
+    """
+    install_feature_store(connection)
+    connection.execute(text("DELETE FROM respondent_features"))
+    connection.execute(text(f"{_UPSERT_FEATURES} {_SELECT_FEATURES}"))
@@ -0,0 +1,218 @@
+# app/features.py
+
+from functools import reduce
+import numpy as np
+from sqlalchemy import String, cast, func
+from app import db
+from app.models import KKProfile, KKDemographics, RespondentFeatures
+
+# SDG 4 (Education) level per Educational_Background value; anything else is 0
+EDUCATION_LEVELS = {
+    'College graduate': 3,
+    'College undergraduate': 3,
+    'High school graduate': 2,
+    'High school undergraduate': 2,
+    'Elementary graduate': 1,
+    'Elementary undergraduate': 1,
+}
+
+UNKNOWN = 'Unknown'
+
+# Column order of the event clustering matrix
+EVENT_FEATURES = [
+    'age', 'education', 'work_status', 'attended', 'voted', 'sex', 'region',
+    'poverty_indicator', 'education_level', 'gender_empowerment',
+    'economic_participation', 'civic_engagement',
+]
+
+# Column order of the SDG support clustering matrix
+SDG_FEATURES = ['poverty_indicator', 'education_level', 'gender_empowerment', 'economic_participation']
+
+
+# Integer columns read from respondent_features, see app/feature_store.py
+STORED_FEATURES = [
+    'age', 'valid_age', 'attended', 'voted', 'poverty_indicator', 'education_level',
+    'gender_empowerment', 'civic_engagement', 'economic_participation',
+]
+
+
+class Categorical:
+    """A string column encoded the way LabelEncoder does it: sorted classes."""
+
+    def __init__(self, values):
+        self.classes, self.codes = np.unique(values, return_inverse=True)
+
+    def codes_for(self, classes):
+        """Codes against a previously fitted (sorted) class list.
+
+        Values the fitted encoder never saw get code ``len(classes)``.
+        """
+        classes = np.asarray(classes)
+        positions = np.searchsorted(classes, self.classes)
+        found = positions < len(classes)
+        found[found] = classes[positions[found]] == self.classes[found]
+        table = np.where(found, positions, len(classes))
+        return table[self.codes]
+
+
+class FeatureFrame:
+    """Joined profile/demographics columns held as NumPy arrays."""
+
+    def __init__(self, rows):
+        (respondent_no, education, work_status, sex, region,
+         *numeric, feature_key) = _columns(rows, 6 + len(STORED_FEATURES))
+
+        self.respondent_no = respondent_no
+        self.feature_key = feature_key
+        self.size = len(respondent_no)
+
+        self.education = Categorical(_fill_unknown(education))
+        self.work_status = Categorical(_fill_unknown(work_status))
+        self.sex = Categorical(_fill_unknown(sex))
+        self.region = Categorical(_fill_unknown(region))
+
+        # Integer columns come ready-made from respondent_features: age
+        # (0 where Age is not all digits, see valid_age), attended, voted and
+        # the SDG indicators (poverty_indicator, education_level,
+        # gender_empowerment, civic_engagement, economic_participation)
+        for name, values in zip(STORED_FEATURES, numeric):
+            setattr(self, name, values.astype(np.int64))
+        self.valid_age = self.valid_age.astype(bool)
+
+    def column(self, name, encoders=None):
+        value = getattr(self, name)
+        if not isinstance(value, Categorical):
+            return value
+        if encoders and name in encoders:
+            return value.codes_for(encoders[name])
+        return value.codes
+
+    def matrix(self, names, encoders=None):
+        if not self.size:
+            return np.empty((0, len(names)), dtype=np.int64)
+        return np.column_stack([self.column(name, encoders) for name in names])
+
+    def event_matrix(self, encoders=None):
+        return self.matrix(EVENT_FEATURES, encoders)
+
+    def sdg_matrix(self):
+        return self.matrix(SDG_FEATURES)
+
+    def encoders(self):
+        # Fitted class lists of every categorical column, for reuse on new rows
+        return {
+            name: [str(c) for c in value.classes]
+            for name, value in vars(self).items()
+            if isinstance(value, Categorical)
+        }
+
+
+def _columns(rows, width):
+    columns = list(zip(*rows))
+    if not columns:
+        return [np.array([], dtype=object) for _ in range(width)]
+    return [np.array(column, dtype=object) for column in columns]
+
+
+def _fill_unknown(values):
+    # ``value or 'Unknown'``: NULL and empty strings become 'Unknown'
+    values = np.asarray(values, dtype=object)
+    missing = (values == None) | (values == '')  # noqa: E711 - elementwise comparison
+    return np.where(missing, UNKNOWN, values).astype(str)
+
+
+def _input_columns():
+    # Everything the clustering matrices are built from, in FeatureFrame order
+    return [
+        KKDemographics.Educational_Background,
+        KKDemographics.Work_Status,
+        KKProfile.Sex_Assigned_by_Birth,
+        KKProfile.Region,
+        *[getattr(RespondentFeatures, name) for name in STORED_FEATURES]
+    ]
+
+
+def feature_key():
+    """SQL expression joining a respondent's clustering inputs into one string.
+
+    Stored with each cluster assignment, so assignments whose inputs have
+    changed since can be found by comparing it (see app/incremental.py).
+    """
+    parts = [func.ifnull(cast(column, String), '', type_=String) for column in _input_columns()]
+    return reduce(lambda left, right: left + '|' + right, parts)
+
+
+def load_feature_frame(criterion=None):
+    """Fetch the joined columns used for clustering in one query.
+
+    ``criterion`` optionally restricts the rows, e.g. to respondents that
+    have no cluster assignment yet.
+    """
+    query = db.session.query(
+        KKProfile.Respondent_No,
+        *_input_columns(),
+        feature_key()
+    ).join(
+        KKDemographics, KKProfile.Respondent_No == KKDemographics.Respondent_No
+    ).join(
+        RespondentFeatures, KKProfile.Respondent_No == RespondentFeatures.Respondent_No
+    )
+    if criterion is not None:
+        query = query.filter(criterion)
+    return FeatureFrame(query.all())
+
+
+def cluster_sizes(labels, n_clusters):
+    return np.bincount(labels, minlength=n_clusters)
+
+
+def cluster_means(labels, values, n_clusters, mask=None):
+    """Mean of ``values`` per cluster (optionally over rows where ``mask``)."""
+    weights = mask.astype(np.float64) if mask is not None else np.ones(len(labels))
+    counts = np.bincount(labels, weights=weights, minlength=n_clusters)
+    sums = np.bincount(labels, weights=values * weights, minlength=n_clusters)
+    return np.divide(sums, counts, out=np.zeros(n_clusters), where=counts > 0)
+
+
+def cluster_modes(labels, categorical, n_clusters, exclude=UNKNOWN):
+    """Most common class per cluster, or None where a cluster has none."""
+    n_classes = len(categorical.classes)
+    table = np.bincount(
+        labels * n_classes + categorical.codes, minlength=n_clusters * n_classes
+    ).reshape(n_clusters, n_classes)
+    table[:, categorical.classes == exclude] = 0
+    best = table.argmax(axis=1)
+    return [str(categorical.classes[b]) if table[i, b] else None for i, b in enumerate(best)]
+
+
+def cluster_first(labels, categorical, n_clusters, exclude=UNKNOWN):
+    """First class seen per cluster, in row order, or None."""
+    keep = categorical.classes[categorical.codes] != exclude
+    clusters, first = np.unique(labels[keep], return_index=True)
+    values = categorical.classes[categorical.codes[keep][first]]
+    result = [None] * n_clusters
+    for cluster, value in zip(clusters, values):
+        result[cluster] = str(value)
+    return result
+
+
+def cluster_bins(labels, points, n_clusters, max_bins=None):
+    """Distinct ``(x, y)`` points per cluster with how many rows sit on each.
+
+    Returns one list of ``{"x", "y", "count"}`` dicts per cluster. With
+    ``max_bins`` the total is capped: each cluster keeps its heaviest bins,
+    in proportion to how many bins it has.
+    """
+    keys = np.column_stack([labels, points]) if len(labels) else np.empty((0, 3))
+    bins, counts = np.unique(keys, axis=0, return_counts=True)
+    per_cluster = [np.flatnonzero(bins[:, 0] == i) for i in range(n_clusters)]
+    if max_bins is not None and len(bins) > max_bins:
+        quota = [max(1, len(idx) * max_bins // len(bins)) for idx in per_cluster]
+        per_cluster = [
+            np.sort(idx[np.argsort(-counts[idx], kind='stable')[:q]])
+            for idx, q in zip(per_cluster, quota)
+        ]
+    return [
+        [{"x": float(bins[j, 1]), "y": float(bins[j, 2]), "count": int(counts[j])} for j in idx]
+        for idx in per_cluster
+    ]
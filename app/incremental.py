@@ -0,0 +1,219 @@
+# app/incremental.py
+
+import os
+from datetime import datetime
+import joblib
+import numpy as np
+from flask import current_app
+from sklearn.cluster import MiniBatchKMeans
+from sqlalchemy import exists, insert, or_
+from app import db
+from app.models import KKProfile, RespondentCluster, RespondentFeatures
+from app.features import feature_key, load_feature_frame
+
+MODEL_KINDS = ('event', 'support')
+
+
+def _model_path(kind):
+    return os.path.join(current_app.config['CLUSTERING_MODEL_DIR'], f'incremental_{kind}.joblib')
+
+
+def _version_path(kind):
+    return os.path.join(current_app.config['CLUSTERING_MODEL_DIR'], f'incremental_{kind}.version')
+
+
+def _state_version(state):
+    return f"{state['fitted_at']}:{state['n_seen']}"
+
+
+def _write_version(kind, version):
+    with open(_version_path(kind), 'w', encoding='utf-8') as f:
+        f.write(version)
+
+
+def load_state(kind):
+    path = _model_path(kind)
+    return joblib.load(path) if os.path.exists(path) else None
+
+
+def save_state(kind, state):
+    os.makedirs(current_app.config['CLUSTERING_MODEL_DIR'], exist_ok=True)
+    joblib.dump(state, _model_path(kind))
+    # Written after the state, so it never names centroids not yet on disk
+    _write_version(kind, _state_version(state))
+
+
+def _read_version(kind):
+    path = _version_path(kind)
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return f.read().strip() or None
+    # A state saved before version markers existed: read it this once
+    state = load_state(kind)
+    if state is None:
+        return None
+    version = _state_version(state)
+    _write_version(kind, version)
+    return version
+
+
+def model_version():
+    """Identifies the persisted centroids, for use in the result cache key.
+
+    Read from the small marker save_state writes next to each state, so
+    building a cache key never unpickles the models.
+    """
+    versions = [_read_version(kind) for kind in MODEL_KINDS]
+    if any(version is None for version in versions):
+        return None
+    return '|'.join(versions)
+
+
+def _matrix(kind, frame, encoders=None):
+    return frame.event_matrix(encoders) if kind == 'event' else frame.sdg_matrix()
+
+
+def _nearest_distances(model, X):
+    # Distance from each row to its closest centroid
+    return np.min(model.transform(X), axis=1)
+
+
+def _partial_fit(model, X, batch_size, rng):
+    order = rng.permutation(len(X))
+    for start in range(0, len(X), batch_size):
+        batch = X[order[start:start + batch_size]]
+        if len(batch) >= model.n_clusters:
+            model.partial_fit(batch)
+
+
+def _store_assignments(frame, event_labels, support_labels):
+    now = datetime.utcnow()
+    rows = [
+        {'Respondent_No': str(no), 'event_cluster': int(e), 'support_cluster': int(s),
+         'assigned_at': now, 'feature_key': key}
+        for no, e, s, key in zip(frame.respondent_no, event_labels, support_labels, frame.feature_key)
+    ]
+    if rows:
+        # Replaces the old assignment of a respondent whose inputs changed
+        db.session.execute(insert(RespondentCluster).prefix_with('OR REPLACE'), rows)
+
+
+def refit(n_clusters, seed):
+    """Fit both models from scratch in mini-batches and reassign everyone."""
+    config = current_app.config
+    frame = load_feature_frame()
+    rng = np.random.default_rng(seed)
+    labels = {}
+    for kind in MODEL_KINDS:
+        encoders = frame.encoders() if kind == 'event' else None
+        X = _matrix(kind, frame)
+        model = MiniBatchKMeans(n_clusters=n_clusters, random_state=seed, batch_size=config['CLUSTERING_BATCH_SIZE'])
+        _partial_fit(model, X, config['CLUSTERING_BATCH_SIZE'], rng)
+        labels[kind] = model.predict(X)
+        save_state(kind, {
+            'model': model,
+            'encoders': encoders,
+            'baseline_distance': float(_nearest_distances(model, X).mean()),
+            'n_seen': len(X),
+            'fitted_at': datetime.utcnow().isoformat(),
+        })
+
+    RespondentCluster.query.delete()
+    _store_assignments(frame, labels['event'], labels['support'])
+    db.session.commit()
+    return {'refit': True, 'assigned': frame.size, 'reassigned': 0, 'removed': 0, 'drift': None}
+
+
+def _unassigned():
+    return ~exists().where(RespondentCluster.Respondent_No == KKProfile.Respondent_No)
+
+
+def _inputs_changed():
+    # Assigned from inputs that have changed since, e.g. by a reload
+    return exists().where(
+        RespondentCluster.Respondent_No == KKProfile.Respondent_No,
+        or_(RespondentCluster.feature_key.is_(None), RespondentCluster.feature_key != feature_key())
+    )
+
+
+def update(n_clusters, seed):
+    """Bring the cluster assignments in line with the current respondents.
+
+    Assignments of respondents that no longer exist are deleted, and
+    respondents whose clustering inputs changed since they were assigned
+    (see feature_key) are predicted again. Respondents with no cluster yet
+    are assigned and folded into the models; only they are fitted, so the
+    cost follows the size of the import, not of the whole table. If the
+    assigned rows sit much further from the centroids than the training
+    data did (drift), the models are refit from scratch when
+    CLUSTERING_REFIT_ON_DRIFT is set and the drift is only reported
+    otherwise.
+    """
+    config = current_app.config
+    states = {kind: load_state(kind) for kind in MODEL_KINDS}
+    if any(state is None or state['model'].n_clusters != n_clusters for state in states.values()):
+        return refit(n_clusters, seed)
+
+    # respondent_features has a row for every respondent that can be clustered
+    removed = RespondentCluster.query.filter(
+        ~exists().where(RespondentFeatures.Respondent_No == RespondentCluster.Respondent_No)
+    ).delete(synchronize_session=False)
+    new = load_feature_frame(_unassigned())
+    changed = load_feature_frame(_inputs_changed())
+    if not new.size and not changed.size:
+        db.session.commit()
+        return {'refit': False, 'assigned': 0, 'reassigned': 0, 'removed': removed, 'drift': None}
+
+    frames = [frame for frame in (new, changed) if frame.size]
+    drift = {}
+    for kind, state in states.items():
+        X = np.vstack([_matrix(kind, frame, state['encoders']) for frame in frames])
+        drift[kind] = float(_nearest_distances(state['model'], X).mean()) / max(state['baseline_distance'], 1e-9)
+
+    if max(drift.values()) > config['CLUSTERING_DRIFT_THRESHOLD']:
+        if config['CLUSTERING_REFIT_ON_DRIFT']:
+            result = refit(n_clusters, seed)
+            result['drift'] = drift
+            return result
+        current_app.logger.warning('Cluster drift detected (%s); run a refit', drift)
+
+    rng = np.random.default_rng(seed)
+    if new.size:
+        for kind, state in states.items():
+            model = state['model']
+            X = _matrix(kind, new, state['encoders'])
+            _partial_fit(model, X, config['CLUSTERING_BATCH_SIZE'], rng)
+            # Keep the drift baseline a running mean over everything seen so far
+            distance = float(_nearest_distances(model, X).mean())
+            total = state['n_seen'] + len(X)
+            state['baseline_distance'] = (state['baseline_distance'] * state['n_seen'] + distance * len(X)) / total
+            state['n_seen'] = total
+            state['fitted_at'] = datetime.utcnow().isoformat()
+            save_state(kind, state)
+
+    # Changed respondents are already part of the models; they are only
+    # predicted again
+    for frame in frames:
+        labels = {
+            kind: state['model'].predict(_matrix(kind, frame, state['encoders']))
+            for kind, state in states.items()
+        }
+        _store_assignments(frame, labels['event'], labels['support'])
+    db.session.commit()
+    return {'refit': False, 'assigned': new.size, 'reassigned': changed.size, 'removed': removed, 'drift': drift}
+
+
+def predict_labels(frame, n_clusters):
+    """Labels for ``frame`` from the persisted centroids, or None if there
+    are no centroids for ``n_clusters`` yet.
+
+    Never fits: fitting rewrites every assignment, which is
+    update_clusters.py's job, not a request's.
+    """
+    states = {kind: load_state(kind) for kind in MODEL_KINDS}
+    if any(state is None or state['model'].n_clusters != n_clusters for state in states.values()):
+        return None
+    return tuple(
+        states[kind]['model'].predict(_matrix(kind, frame, states[kind]['encoders']))
+        for kind in MODEL_KINDS
+    )
@@ -0,0 +1,30 @@
+# app/indexes.py
+
+from sqlalchemy import text
+
+# Secondary indexes for the filters, dropdowns and groupings in routes.py.
+# The Respondent_No indexes the joins use are created with the feature
+# store (app/feature_store.py). check_query_plans.py fails if a route query
+# goes back to a full table scan.
+ROUTE_INDEX_DDL = [
+    # data_table: Region filter paged in Respondent_No order, and the
+    # DISTINCT Region dropdown read from the index alone
+    "CREATE INDEX IF NOT EXISTS ix_kk_profile_region ON kk_profile (Region, Respondent_No)",
+    # index: DISTINCT Barangay dropdown; the dashboard fallback groups by
+    # barangay, sex and age bucket in index order without touching the table
+    "CREATE INDEX IF NOT EXISTS ix_kk_profile_barangay ON kk_profile (Barangay, Sex_Assigned_by_Birth, age_bucket)",
+    # dashboard fallback grouping of kk_demographics, covered
+    "CREATE INDEX IF NOT EXISTS ix_kk_demographics_education ON kk_demographics (Educational_Background, Work_Status)",
+]
+
+DROP_ROUTE_INDEX_DDL = [
+    "DROP INDEX IF EXISTS ix_kk_demographics_education",
+    "DROP INDEX IF EXISTS ix_kk_profile_barangay",
+    "DROP INDEX IF EXISTS ix_kk_profile_region",
+]
+
+
+def install_route_indexes(connection):
+    """Create the route indexes if missing (a dump reload drops them)."""
+    for statement in ROUTE_INDEX_DDL:
+        connection.execute(text(statement))
@@ -0,0 +1,156 @@
+# app/jobs.py
+
+import json
+import multiprocessing
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import create_engine, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import NullPool
+from app import db
+from app.models import ClusteringJob
+from app.clustering_cache import current_key
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+_executor = None
+# One Flask app per pool process, created on its first job
+_worker_app = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        # spawn, not fork: a forked child would inherit the parent's open
+        # SQLite connections and Flask state
+        _executor = ProcessPoolExecutor(
+            max_workers=current_app.config['CLUSTERING_JOB_WORKERS'],
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return _executor
+
+
+def _is_stale(job):
+    # A job whose pool died with its worker process stays queued/running
+    # forever. A queued job is lost once it has waited past the timeout; a
+    # running one once its heartbeat stops, so a long computation whose
+    # worker is alive is never resubmitted
+    config = current_app.config
+    if job.status == 'queued':
+        last_seen = job.submitted_at
+        timeout = timedelta(seconds=config['CLUSTERING_JOB_TIMEOUT'])
+    else:
+        last_seen = job.heartbeat_at or job.started_at
+        timeout = timedelta(seconds=3 * config['CLUSTERING_JOB_HEARTBEAT'])
+    return last_seen is None or datetime.utcnow() - last_seen > timeout
+
+
+class _Heartbeat(threading.Thread):
+    """Touches a running job's heartbeat_at every ``interval`` seconds until stopped.
+
+    Uses its own unpooled engine: the job's session holds the single
+    writer connection for as long as the computation runs.
+    """
+
+    def __init__(self, url, job_id, interval):
+        super().__init__(daemon=True)
+        self.engine = create_engine(url, poolclass=NullPool)
+        self.job_id = job_id
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                with self.engine.begin() as connection:
+                    connection.execute(
+                        update(ClusteringJob.__table__)
+                        .where(ClusteringJob.id == self.job_id, ClusteringJob.status == 'running')
+                        .values(heartbeat_at=datetime.utcnow())
+                    )
+            except OperationalError:
+                # Database busy; the next beat will do
+                pass
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        self.engine.dispose()
+
+
+def submit_clustering_job(params, key):
+    """Return the active job computing ``params`` for the current data.
+
+    ``key`` is the result's cache key for the current data. A new job is
+    queued only if there is none in flight for the same key, so concurrent
+    page loads share one computation.
+    """
+    job = (ClusteringJob.query
+           .filter(ClusteringJob.cache_key == key, ClusteringJob.status.in_(ACTIVE_STATUSES))
+           .order_by(ClusteringJob.submitted_at.desc())
+           .first())
+    if job is not None and not _is_stale(job):
+        return job
+    if job is not None:
+        job.status = 'failed'
+        job.error = 'Lost when its worker process exited; resubmitted.'
+        job.finished_at = datetime.utcnow()
+
+    job = ClusteringJob(id=uuid.uuid4().hex, cache_key=key, params=json.dumps(params, sort_keys=True))
+    db.session.add(job)
+    db.session.commit()
+
+    overrides = {'SQLALCHEMY_DATABASE_URI': current_app.config['SQLALCHEMY_DATABASE_URI']}
+    get_executor().submit(run_clustering_job, job.id, overrides)
+    return job
+
+
+def run_clustering_job(job_id, config_overrides=None):
+    """Pool process entry point: compute and cache one clustering result."""
+    global _worker_app
+    from app import create_app
+    from app.clustering import compute_clustering
+    from app.clustering_cache import store_result
+
+    if _worker_app is None:
+        _worker_app = create_app(config_overrides)
+
+    with _worker_app.app_context():
+        job = db.session.get(ClusteringJob, job_id)
+        if job is None or job.status != 'queued':
+            return
+        params = json.loads(job.params)
+        fingerprint, key = current_key(params)
+        if key != job.cache_key:
+            # The data changed while the job was queued: compute for the
+            # data as it is now, and let page loads for it find this job
+            job.cache_key = key
+        job.status = 'running'
+        job.started_at = job.heartbeat_at = datetime.utcnow()
+        cache_key = job.cache_key
+        db.session.commit()
+
+        heartbeat = _Heartbeat(db.engine.url, job_id, current_app.config['CLUSTERING_JOB_HEARTBEAT'])
+        heartbeat.start()
+        try:
+            store_result(fingerprint, cache_key, params, compute_clustering(params))
+        except Exception:
+            # The traceback goes to the log; job.error is shown to users
+            current_app.logger.exception('Clustering job %s failed', job_id)
+            db.session.rollback()
+            outcome = {'status': 'failed', 'error': 'Clustering failed. See the server log for details.'}
+        else:
+            outcome = {'status': 'done'}
+        finally:
+            heartbeat.stop()
+
+        # Only finish the job if it is still ours: one given up as lost and
+        # resubmitted meanwhile keeps the failed status it was given
+        (ClusteringJob.query
+         .filter(ClusteringJob.id == job_id, ClusteringJob.status == 'running')
+         .update({**outcome, 'finished_at': datetime.utcnow()}, synchronize_session=False))
+        db.session.commit()
+        db.session.remove()
@@ -0,0 +1,25 @@
+# app/maintenance.py
+
+from app.profile_schema import retype_profile
+from app.search import rebuild_search_index
+from app.rollups import rebuild_rollups
+from app.feature_store import rebuild_feature_store
+from app.data_version import bump_data_version
+from app.delta_import import rebuild_row_hashes
+from app.indexes import install_route_indexes
+
+
+def refresh_derived_data(connection):
+    """Bring everything derived from kk_profile/kk_demographics up to date.
+
+    The import scripts call this after a bulk load. Reloading a dump drops
+    and recreates the base tables, which also drops their triggers, so each
+    step reinstalls its triggers before recomputing.
+    """
+    retype_profile(connection)
+    install_route_indexes(connection)
+    rebuild_search_index(connection)
+    rebuild_rollups(connection)
+    rebuild_feature_store(connection)
+    rebuild_row_hashes(connection)
+    bump_data_version(connection)
@@ -0,0 +1,61 @@
+# app/metrics.py
+
+import numpy as np
+from scipy import stats
+from sklearn.metrics import silhouette_score, calinski_harabasz_score, davies_bouldin_score
+
+SILHOUETTE_MODES = ('auto', 'exact', 'sampled')
+
+
+def silhouette(X, labels, mode='auto', sample_size=5000, seed=0, repeats=1):
+    """Silhouette score, exact or estimated from random samples.
+
+    The exact score is O(n^2) in the number of respondents. In sampled mode
+    it is computed on ``sample_size`` rows, ``repeats`` times with seeds
+    derived from ``seed``, and the mean is returned along with a 95%
+    confidence interval when there is more than one repeat. ``auto`` is
+    exact when the data fits in one sample. Returns a dict with ``score``,
+    ``mode``, ``sample_size``, ``repeats`` and ``ci`` (``[low, high]`` or
+    None), or None when there are fewer than two clusters.
+    """
+    if mode not in SILHOUETTE_MODES:
+        raise ValueError(f"Unknown silhouette mode: {mode}")
+    n = len(labels)
+    if len(set(labels)) < 2:
+        return None
+
+    if mode == 'exact' or (mode == 'auto' and n <= sample_size):
+        return {
+            'score': float(silhouette_score(X, labels)),
+            'mode': 'exact',
+            'sample_size': n,
+            'repeats': 1,
+            'ci': None,
+        }
+
+    size = min(sample_size, n)
+    repeats = max(1, repeats)
+    scores = np.array([
+        silhouette_score(X, labels, sample_size=size, random_state=seed + r)
+        for r in range(repeats)
+    ])
+    ci = None
+    if repeats > 1:
+        # Student's t, not 1.96: with a handful of repeats the normal
+        # quantile gives an interval that is too narrow
+        half_width = stats.t.ppf(0.975, repeats - 1) * scores.std(ddof=1) / np.sqrt(repeats)
+        ci = [float(scores.mean() - half_width), float(scores.mean() + half_width)]
+    return {
+        'score': float(scores.mean()),
+        'mode': 'sampled',
+        'sample_size': size,
+        'repeats': repeats,
+        'ci': ci,
+    }
+
+
+def linear_metrics(X, labels):
+    # Calinski-Harabasz and Davies-Bouldin are linear in n, so always exact
+    if len(set(labels)) < 2:
+        return None, None
+    return float(calinski_harabasz_score(X, labels)), float(davies_bouldin_score(X, labels))
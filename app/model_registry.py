@@ -0,0 +1,132 @@
+# app/model_registry.py
+
+import json
+import os
+import shutil
+from datetime import datetime
+import joblib
+from flask import current_app
+
+MODEL_KINDS = ('event', 'support')
+
+# Pinned models loaded by this worker, keyed by kind
+_pinned_cache = {}
+
+
+def _kind_dir(kind):
+    if kind not in MODEL_KINDS:
+        raise ValueError(f"Unknown model kind: {kind}")
+    return os.path.join(current_app.config['CLUSTERING_MODEL_DIR'], 'registry', kind)
+
+
+def _version_dir(kind, version):
+    return os.path.join(_kind_dir(kind), version)
+
+
+def _pin_path(kind):
+    return os.path.join(_kind_dir(kind), 'PINNED')
+
+
+def save_model(kind, model, encoders, feature_schema, seed, metrics, fingerprint):
+    """Store a fitted model with everything needed to reuse it; returns its version."""
+    version = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+    path = _version_dir(kind, version)
+    os.makedirs(path)
+    # Uncompressed, so the centroid arrays can be memory-mapped on load
+    joblib.dump({'model': model, 'encoders': encoders}, os.path.join(path, 'model.joblib'))
+    meta = {
+        'kind': kind,
+        'version': version,
+        'n_clusters': int(model.n_clusters),
+        'algorithm': type(model).__name__,
+        'feature_schema': list(feature_schema),
+        'seed': seed,
+        'metrics': metrics,
+        'fingerprint': fingerprint,
+        'created_at': datetime.utcnow().isoformat(),
+    }
+    with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    _prune(kind)
+    return version
+
+
+def _prune(kind):
+    # Keep the newest CLUSTERING_REGISTRY_KEEP versions plus the pinned one
+    keep = current_app.config['CLUSTERING_REGISTRY_KEEP']
+    pinned = pinned_version(kind)
+    versions = sorted(_versions(kind), reverse=True)
+    for version in versions[keep:]:
+        if version != pinned:
+            shutil.rmtree(_version_dir(kind, version), ignore_errors=True)
+
+
+def _versions(kind):
+    root = _kind_dir(kind)
+    if not os.path.isdir(root):
+        return []
+    return [name for name in os.listdir(root) if os.path.isfile(os.path.join(root, name, 'meta.json'))]
+
+
+def list_models(kind):
+    """Metadata of every stored version of ``kind``, newest first."""
+    pinned = pinned_version(kind)
+    models = []
+    for version in sorted(_versions(kind), reverse=True):
+        with open(os.path.join(_version_dir(kind, version), 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        meta['pinned'] = version == pinned
+        models.append(meta)
+    return models
+
+
+def pinned_version(kind):
+    path = _pin_path(kind)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return f.read().strip() or None
+
+
+def pin(kind, version):
+    if version not in _versions(kind):
+        raise ValueError(f"No {kind} model version {version}")
+    with open(_pin_path(kind), 'w', encoding='utf-8') as f:
+        f.write(version)
+    _pinned_cache.pop(kind, None)
+
+
+def unpin(kind):
+    if os.path.exists(_pin_path(kind)):
+        os.remove(_pin_path(kind))
+    _pinned_cache.pop(kind, None)
+
+
+def load_model(kind, version):
+    """Load a stored model; its arrays are memory-mapped read-only."""
+    payload = joblib.load(os.path.join(_version_dir(kind, version), 'model.joblib'), mmap_mode='r')
+    return payload['model'], payload['encoders']
+
+
+def get_pinned(kind):
+    """The pinned ``(version, model, encoders)`` for ``kind``, or None.
+
+    Loaded once per worker and reloaded when the pin changes.
+    """
+    version = pinned_version(kind)
+    if version is None:
+        return None
+    cached = _pinned_cache.get(kind)
+    if cached is None or cached[0] != version:
+        model, encoders = load_model(kind, version)
+        cached = _pinned_cache[kind] = (version, model, encoders)
+    return cached
+
+
+def load_pinned_models():
+    # Called at worker startup so the first request does not pay for the load
+    for kind in MODEL_KINDS:
+        try:
+            get_pinned(kind)
+        except (OSError, ValueError) as e:
+            current_app.logger.warning('Could not load pinned %s model: %s', kind, e)
@@ -0,0 +1,50 @@
+# app/model_selection.py
+
+from joblib import Parallel, delayed
+from sklearn.cluster import KMeans
+from app.metrics import silhouette, linear_metrics
+
+
+def _fit_and_score(name, X, k, seed, silhouette_options):
+    model = KMeans(n_clusters=k, random_state=seed, n_init=10).fit(X)
+    # The same seed for every k scores each candidate on the same sample rows
+    score = silhouette(X, model.labels_, seed=seed, **silhouette_options)
+    calinski, davies = linear_metrics(X, model.labels_)
+    return name, model, {
+        'k': k,
+        'silhouette': score['score'] if score else None,
+        'silhouette_ci': score['ci'] if score else None,
+        'calinski': calinski,
+        'davies': davies,
+    }
+
+
+def select_k(matrices, k_values, seed, silhouette_options, n_jobs=-1):
+    """Fit KMeans for every k on every named matrix, in parallel.
+
+    ``matrices`` maps a name to a feature matrix. All fits run as one batch
+    of joblib tasks, so with enough cores the sweep takes about as long as
+    its slowest single fit. For each name returns ``(model, sweep)``: the
+    fitted model with the best silhouette (ties go to the smaller k) and
+    the scores of every k tried, in k order, with the chosen one marked.
+    """
+    tasks = [
+        delayed(_fit_and_score)(name, X, k, seed, silhouette_options)
+        for name, X in matrices.items()
+        for k in k_values
+        if k < len(X)
+    ]
+    results = Parallel(n_jobs=n_jobs)(tasks)
+
+    selected = {}
+    for name in matrices:
+        candidates = [(model, scores) for n, model, scores in results if n == name]
+        if not candidates:
+            raise ValueError(f"Not enough rows to cluster {name} for k in {list(k_values)}")
+        best_model, best = max(
+            candidates,
+            key=lambda c: (c[1]['silhouette'] is not None, c[1]['silhouette'] or 0, -c[1]['k'])
+        )
+        sweep = [dict(scores, selected=scores is best) for _, scores in candidates]
+        selected[name] = (best_model, sweep)
+    return selected
@@ -1,6 +1,8 @@
 # app/models.py
 
+from datetime import datetime
 from app import db
+from app.profile_schema import age_group_sql
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 
@@ -21,6 +23,8 @@ class KKProfile(db.Model):
     Birthday = db.Column(db.Date)
     Email_Address = db.Column(db.String(255))
     Contact_No = db.Column(db.String(20))
+    # Generated by SQLite from Age (see app/profile_schema.py)
+    age_bucket = db.Column(db.String(5), db.Computed(age_group_sql('Age'), persisted=True))
 
     demographics = db.relationship('KKDemographics', backref='profile', uselist=False)
 
@@ -55,3 +59,86 @@ class User(db.Model, UserMixin):
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
+
+class ClusteringResult(db.Model):
+    __tablename__ = 'clustering_result'
+    cache_key = db.Column(db.String(64), primary_key=True)
+    fingerprint = db.Column(db.String(255), nullable=False, index=True)
+    params = db.Column(db.Text, nullable=False)
+    result = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ClusteringResult {self.cache_key[:12]}>"
+
+class ClusteringJob(db.Model):
+    __tablename__ = 'clustering_job'
+    id = db.Column(db.String(32), primary_key=True)
+    cache_key = db.Column(db.String(64), nullable=False, index=True)
+    params = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='queued')
+    error = db.Column(db.Text)
+    submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    # Touched by the worker while the job runs
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        queued_seconds = run_seconds = None
+        if self.started_at and self.submitted_at:
+            queued_seconds = (self.started_at - self.submitted_at).total_seconds()
+        if self.finished_at and self.started_at:
+            run_seconds = (self.finished_at - self.started_at).total_seconds()
+        return {
+            "id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "submitted_at": self.submitted_at.isoformat() if self.submitted_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "queued_seconds": queued_seconds,
+            "run_seconds": run_seconds,
+        }
+
+    def __repr__(self):
+        return f"<ClusteringJob {self.id} {self.status}>"
+
+class RespondentCluster(db.Model):
+    __tablename__ = 'respondent_cluster'
+    Respondent_No = db.Column(db.String(14), primary_key=True)
+    event_cluster = db.Column(db.Integer, nullable=False)
+    support_cluster = db.Column(db.Integer, nullable=False)
+    assigned_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # The inputs the labels were predicted from (app.features.feature_key)
+    feature_key = db.Column(db.Text)
+
+    def __repr__(self):
+        return f"<RespondentCluster {self.Respondent_No} {self.event_cluster}/{self.support_cluster}>"
+
+class RespondentRecommendation(db.Model):
+    __tablename__ = 'respondent_recommendation'
+    Respondent_No = db.Column(db.String(14), primary_key=True)
+    recommendation = db.Column(db.Text, nullable=False)
+    ruleset = db.Column(db.String(32), nullable=False)
+    generated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<RespondentRecommendation {self.Respondent_No}>"
+
+class RespondentFeatures(db.Model):
+    # Maintained by triggers, see app/feature_store.py
+    __tablename__ = 'respondent_features'
+    Respondent_No = db.Column(db.String(14), primary_key=True)
+    age = db.Column(db.Integer, nullable=False)
+    valid_age = db.Column(db.Integer, nullable=False)
+    attended = db.Column(db.Integer, nullable=False)
+    voted = db.Column(db.Integer, nullable=False)
+    poverty_indicator = db.Column(db.Integer, nullable=False)
+    education_level = db.Column(db.Integer, nullable=False)
+    gender_empowerment = db.Column(db.Integer, nullable=False)
+    civic_engagement = db.Column(db.Integer, nullable=False)
+    economic_participation = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<RespondentFeatures {self.Respondent_No}>"
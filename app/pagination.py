@@ -0,0 +1,61 @@
+# app/pagination.py
+
+
+class KeysetPage:
+    """One page of a keyset (cursor) paginated query.
+
+    Cursors are the key values of the first and last rows on the page, so
+    fetching any page is a single indexed range scan with a LIMIT.
+    """
+
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def get_per_page(requested, default, maximum):
+    # Clamp a user supplied page size to the configured cap
+    if not requested or requested < 1:
+        return default
+    return min(requested, maximum)
+
+
+def keyset_paginate(query, column, after=None, before=None, per_page=20):
+    """Paginate ``query`` on the unique, ordered ``column``.
+
+    Pass ``after`` to get the page following a cursor and ``before`` to get
+    the page preceding one. One extra row is fetched to know whether
+    another page exists, so no COUNT(*) or OFFSET is ever issued.
+    """
+    key = column.key
+
+    if before:
+        rows = (query.filter(column < before)
+                .order_by(column.desc())
+                .limit(per_page + 1)
+                .all())
+        has_more = len(rows) > per_page
+        items = rows[:per_page][::-1]
+        prev_cursor = getattr(items[0], key) if has_more else None
+        # We came back from the page starting at ``before``, so it still exists
+        next_cursor = getattr(items[-1], key) if items else None
+        return KeysetPage(items, per_page, next_cursor, prev_cursor)
+
+    if after:
+        query = query.filter(column > after)
+    rows = query.order_by(column).limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    items = rows[:per_page]
+    next_cursor = getattr(items[-1], key) if has_more else None
+    prev_cursor = getattr(items[0], key) if after and items else None
+    return KeysetPage(items, per_page, next_cursor, prev_cursor)
@@ -0,0 +1,120 @@
+# app/profile_schema.py
+
+from sqlalchemy import text
+from app.dates import PROFILE_DATE_COLUMNS, normalize_profile_dates
+
+AGE_GROUP_BOUNDS = [('15-17', 15, 17), ('18-21', 18, 21), ('22-24', 22, 24), ('25-30', 25, 30)]
+AGE_GROUPS = [group for group, _, _ in AGE_GROUP_BOUNDS]
+
+
+def age_group_sql(column):
+    # Bucket of an integer age column; ages outside 15-30 get NULL
+    whens = ' '.join(
+        f"WHEN {column} BETWEEN {low} AND {high} THEN '{group}'"
+        for group, low, high in AGE_GROUP_BOUNDS
+    )
+    return f"CASE {whens} ELSE NULL END"
+
+
+_ISO_GLOB = "'[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'"
+_DIGITS = "(CAST({column} AS TEXT) GLOB '[0-9]*' AND CAST({column} AS TEXT) NOT GLOB '*[^0-9]*')"
+
+# Declared type of each typed column, and how an untyped value is converted
+# when the table is rebuilt (anything that does not convert becomes NULL).
+# The CHECKs keep text from creeping back in through raw SQL writes.
+TYPED_COLUMNS = {
+    'Age': ("INTEGER CHECK (Age IS NULL OR typeof(Age) = 'integer')",
+            f"CASE WHEN {_DIGITS.format(column='Age')} THEN CAST(Age AS INTEGER) END"),
+    **{
+        column: (f"DATE CHECK ({column} IS NULL OR {column} GLOB {_ISO_GLOB})",
+                 f"CASE WHEN {column} GLOB {_ISO_GLOB} THEN {column} END")
+        for column in PROFILE_DATE_COLUMNS
+    },
+}
+
+# Stored so it can be indexed and grouped on without evaluating the CASE per row
+AGE_BUCKET_DDL = f"age_bucket VARCHAR(5) GENERATED ALWAYS AS ({age_group_sql('Age')}) STORED"
+
+
+def is_typed(connection):
+    # table_xinfo also lists generated columns, which table_info leaves out
+    columns = [row[1] for row in connection.execute(text("PRAGMA table_xinfo(kk_profile)"))]
+    return 'age_bucket' in columns
+
+
+def _rebuild_profile(connection, column_types, select_expressions, extra_columns=()):
+    """Copy kk_profile into a table with the given column types and swap it in.
+
+    Indexes are recreated on the new table, except ones on a column it no
+    longer has (age_bucket when untyping). Triggers on kk_profile go with
+    the old table; refresh_derived_data puts them back.
+    """
+    info = connection.execute(text("PRAGMA table_info(kk_profile)")).all()
+    names = [row[1] for row in info]
+    # Explicit indexes only (sql is NULL for the automatic ones), with the
+    # columns each covers (None for an expression)
+    indexes = [
+        (sql, [row[2] for row in connection.execute(text(f'PRAGMA index_info("{name}")'))])
+        for name, sql in connection.execute(text(
+            "SELECT name, sql FROM sqlite_master "
+            "WHERE type = 'index' AND tbl_name = 'kk_profile' AND sql IS NOT NULL"
+        )).all()
+    ]
+    primary_key = [row[1] for row in sorted(info, key=lambda row: row[5]) if row[5]]
+    definitions = [
+        f"{name} {column_types.get(name, declared)}{' NOT NULL' if notnull else ''}"
+        for _, name, declared, notnull, _, _ in info
+    ] + list(extra_columns)
+    if primary_key:
+        definitions.append(f"PRIMARY KEY ({', '.join(primary_key)})")
+
+    body = ',\n  '.join(definitions)
+    connection.execute(text("DROP TABLE IF EXISTS kk_profile_rebuild"))
+    connection.execute(text(f"CREATE TABLE kk_profile_rebuild (\n  {body}\n)"))
+    connection.execute(text(
+        f"INSERT INTO kk_profile_rebuild ({', '.join(names)}) "
+        f"SELECT {', '.join(select_expressions.get(name, name) for name in names)} FROM kk_profile"
+    ))
+    connection.execute(text("DROP TABLE kk_profile"))
+    # Triggers on kk_demographics still name kk_profile; legacy mode renames
+    # without re-parsing them against a schema that briefly lacks the table
+    connection.execute(text("PRAGMA legacy_alter_table = ON"))
+    try:
+        connection.execute(text("ALTER TABLE kk_profile_rebuild RENAME TO kk_profile"))
+    finally:
+        connection.execute(text("PRAGMA legacy_alter_table = OFF"))
+
+    new_columns = set(names) | {definition.split()[0] for definition in extra_columns}
+    for sql, columns in indexes:
+        if all(column is None or column in new_columns for column in columns):
+            connection.execute(text(sql))
+
+
+def retype_profile(connection):
+    """Store Age as INTEGER and Date/Birthday as ISO dates, with age_bucket.
+
+    Dumps create every kk_profile column as TEXT, so this runs after each
+    reload (from refresh_derived_data) and does nothing once the table is
+    typed. Dates are normalised first (unparseable ones are recorded in
+    date_rejects); ages that are not whole numbers become NULL, which is
+    how every reader already treated them. Returns True if the table was
+    rebuilt.
+    """
+    if is_typed(connection):
+        return False
+    normalize_profile_dates(connection)
+    _rebuild_profile(
+        connection,
+        {name: declared for name, (declared, _) in TYPED_COLUMNS.items()},
+        {name: expression for name, (_, expression) in TYPED_COLUMNS.items()},
+        extra_columns=[AGE_BUCKET_DDL],
+    )
+    return True
+
+
+def untype_profile(connection):
+    """Back to the dump's all-TEXT kk_profile, without age_bucket."""
+    if not is_typed(connection):
+        return False
+    _rebuild_profile(connection, {name: 'TEXT' for name in TYPED_COLUMNS}, {})
+    return True
@@ -0,0 +1,383 @@
+# app/recommendations.py
+
+import random
+import zlib
+from datetime import datetime
+import numpy as np
+from app import db
+from app.features import load_feature_frame
+from app.models import RespondentRecommendation
+
+# Identifies the rule set below; stored with every batch assignment
+RULESET_VERSION = 'sdg-rules-v1'
+
+DEFAULT_RECOMMENDATION = "SDG 4: Quality Education Program • SDG 8: Decent Work Initiative • SDG 17: Partnership Building"
+
+
+def rank_recommendations(education, work_status, sex, age_group, engagement_level, avg_age):
+    """
+    Candidate event/program recommendations aligned with the 17 SDGs, as
+    (recommendation, priority score) pairs, best first
+    """
+    recommendations = []
+    
+    # SDG 1: No Poverty - Employment and Economic Empowerment
+    if work_status == 'Unemployed':
+        recommendations.extend([
+            'SDG 1: Poverty Alleviation Workshop',
+            'SDG 1: Financial Literacy Training',
+            'SDG 1: Micro-entrepreneurship Program',
+            'SDG 1: Job Skills Development',
+            'SDG 1: Economic Empowerment Initiative'
+        ])
+    
+    # SDG 2: Zero Hunger - Food Security and Nutrition
+    if education in ['Elementary graduate', 'Elementary undergraduate'] or avg_age < 20:
+        recommendations.extend([
+            'SDG 2: Nutrition Education Program',
+            'SDG 2: Community Garden Initiative',
+            'SDG 2: Food Security Workshop',
+            'SDG 2: Sustainable Agriculture Training',
+            'SDG 2: Healthy Eating Campaign'
+        ])
+    
+    # SDG 3: Good Health and Well-being - Health Programs
+    if sex == 'Female' or age_group == 'Teen':
+        recommendations.extend([
+            'SDG 3: Mental Health Awareness',
+            'SDG 3: Reproductive Health Education',
+            'SDG 3: Physical Wellness Program',
+            'SDG 3: Substance Abuse Prevention',
+            'SDG 3: Healthcare Access Workshop'
+        ])
+    
+    # SDG 4: Quality Education - Educational Programs
+    if education in ['High school graduate', 'High school undergraduate']:
+        recommendations.extend([
+            'SDG 4: Digital Literacy Training',
+            'SDG 4: STEM Education Program',
+            'SDG 4: Life Skills Development',
+            'SDG 4: Academic Excellence Support',
+            'SDG 4: Vocational Skills Training'
+        ])
+    elif education in ['Elementary graduate', 'Elementary undergraduate']:
+        recommendations.extend([
+            'SDG 4: Basic Literacy Program',
+            'SDG 4: Numeracy Skills Training',
+            'SDG 4: Computer Basics Course',
+            'SDG 4: Language Development',
+            'SDG 4: Educational Support Program'
+        ])
+    
+    # SDG 5: Gender Equality - Gender Empowerment
+    if sex == 'Female':
+        recommendations.extend([
+            'SDG 5: Women Leadership Program',
+            'SDG 5: Gender Equality Workshop',
+            'SDG 5: Women in STEM Initiative',
+            'SDG 5: Economic Empowerment for Women',
+            'SDG 5: Women\'s Rights Advocacy'
+        ])
+    elif sex == 'Male':
+        recommendations.extend([
+            'SDG 5: Men for Gender Equality',
+            'SDG 5: Positive Masculinity Workshop',
+            'SDG 5: Gender Sensitivity Training',
+            'SDG 5: Allyship Development Program',
+            'SDG 5: Gender Equality Advocacy'
+        ])
+    
+    # SDG 6: Clean Water and Sanitation - Environmental Health
+    if engagement_level < 0.5:  # Low engagement - community building
+        recommendations.extend([
+            'SDG 6: Water Conservation Workshop',
+            'SDG 6: Sanitation Awareness Program',
+            'SDG 6: Environmental Health Training',
+            'SDG 6: Community Clean-up Initiative',
+            'SDG 6: Water Safety Education'
+        ])
+    
+    # SDG 7: Affordable and Clean Energy - Energy Education
+    if education in ['College graduate', 'College undergraduate']:
+        recommendations.extend([
+            'SDG 7: Renewable Energy Workshop',
+            'SDG 7: Energy Conservation Training',
+            'SDG 7: Green Technology Program',
+            'SDG 7: Sustainable Energy Initiative',
+            'SDG 7: Energy Efficiency Workshop'
+        ])
+    
+    # SDG 8: Decent Work and Economic Growth - Employment
+    if work_status == 'Unemployed' or age_group == 'Young Adult':
+        recommendations.extend([
+            'SDG 8: Career Development Program',
+            'SDG 8: Entrepreneurship Training',
+            'SDG 8: Professional Skills Workshop',
+            'SDG 8: Job Market Preparation',
+            'SDG 8: Economic Growth Initiative'
+        ])
+    
+    # SDG 9: Industry, Innovation and Infrastructure - Innovation
+    if education in ['College graduate', 'College undergraduate'] or age_group == 'Young Adult':
+        recommendations.extend([
+            'SDG 9: Innovation Workshop',
+            'SDG 9: Technology Skills Training',
+            'SDG 9: Digital Infrastructure Program',
+            'SDG 9: Industry 4.0 Awareness',
+            'SDG 9: Innovation Hub Initiative'
+        ])
+    
+    # SDG 10: Reduced Inequalities - Social Inclusion
+    if engagement_level < 0.5 or education in ['Elementary graduate', 'Elementary undergraduate']:
+        recommendations.extend([
+            'SDG 10: Social Inclusion Program',
+            'SDG 10: Diversity Training Workshop',
+            'SDG 10: Equal Opportunity Initiative',
+            'SDG 10: Community Integration Program',
+            'SDG 10: Anti-Discrimination Workshop'
+        ])
+    
+    # SDG 11: Sustainable Cities and Communities - Urban Development
+    if age_group == 'Young Adult' or age_group == 'Adult':
+        recommendations.extend([
+            'SDG 11: Urban Planning Workshop',
+            'SDG 11: Community Development Program',
+            'SDG 11: Sustainable City Initiative',
+            'SDG 11: Public Space Improvement',
+            'SDG 11: Urban Innovation Program'
+        ])
+    
+    # SDG 12: Responsible Consumption and Production - Sustainability
+    if engagement_level > 1.5:  # High engagement - leadership
+        recommendations.extend([
+            'SDG 12: Sustainable Living Workshop',
+            'SDG 12: Circular Economy Training',
+            'SDG 12: Waste Reduction Program',
+            'SDG 12: Green Consumerism Initiative',
+            'SDG 12: Sustainable Production Workshop'
+        ])
+    
+    # SDG 13: Climate Action - Environmental Protection
+    if age_group == 'Teen' or engagement_level > 1.0:
+        recommendations.extend([
+            'SDG 13: Climate Change Awareness',
+            'SDG 13: Environmental Protection Program',
+            'SDG 13: Carbon Footprint Workshop',
+            'SDG 13: Climate Action Initiative',
+            'SDG 13: Green Advocacy Training'
+        ])
+    
+    # SDG 14: Life Below Water - Marine Conservation
+    if engagement_level > 0.5:  # Moderate to high engagement
+        recommendations.extend([
+            'SDG 14: Marine Conservation Workshop',
+            'SDG 14: Ocean Protection Program',
+            'SDG 14: Coastal Clean-up Initiative',
+            'SDG 14: Marine Life Awareness',
+            'SDG 14: Ocean Sustainability Training'
+        ])
+    
+    # SDG 15: Life on Land - Terrestrial Conservation
+    if age_group == 'Teen' or age_group == 'Young Adult':
+        recommendations.extend([
+            'SDG 15: Biodiversity Conservation',
+            'SDG 15: Forest Protection Program',
+            'SDG 15: Wildlife Awareness Workshop',
+            'SDG 15: Land Restoration Initiative',
+            'SDG 15: Ecosystem Protection Training'
+        ])
+    
+    # SDG 16: Peace, Justice and Strong Institutions - Governance
+    if engagement_level > 1.5 or education in ['College graduate', 'College undergraduate']:
+        recommendations.extend([
+            'SDG 16: Good Governance Workshop',
+            'SDG 16: Human Rights Education',
+            'SDG 16: Peace Building Program',
+            'SDG 16: Justice System Awareness',
+            'SDG 16: Civic Engagement Initiative'
+        ])
+    
+    # SDG 17: Partnerships for the Goals - Collaboration
+    if engagement_level > 1.0:  # Moderate to high engagement
+        recommendations.extend([
+            'SDG 17: Global Partnership Workshop',
+            'SDG 17: International Cooperation Program',
+            'SDG 17: Cross-cultural Exchange Initiative',
+            'SDG 17: Partnership Building Training',
+            'SDG 17: Collaborative Development Program'
+        ])
+    
+    # Remove duplicates (keeping rule order, so ties sort the same every run) and select top 3 most relevant
+    unique_recommendations = list(dict.fromkeys(recommendations))
+    
+    # Prioritize based on combination of factors
+    priority_scores = {}
+    for rec in unique_recommendations:
+        score = 0
+        # Education match
+        if any(edu in rec.lower() for edu in [education.lower() if education != 'Unknown' else '']):
+            score += 3
+        # Employment match
+        if any(work in rec.lower() for work in [work_status.lower() if work_status != 'Unknown' else '']):
+            score += 3
+        # Age group match
+        if age_group.lower() in rec.lower():
+            score += 2
+        # Engagement level match
+        if engagement_level < 0.5 and 'outreach' in rec.lower():
+            score += 2
+        elif engagement_level > 1.5 and 'leadership' in rec.lower():
+            score += 2
+        priority_scores[rec] = score
+    
+    # Sort by priority score and add randomization for variety
+    return sorted(priority_scores.items(), key=lambda x: x[1], reverse=True)
+
+
+def pick_recommendations(ranked, choose):
+    """Top two ranked recommendations plus one picked by ``choose``.
+
+    ``choose`` gets the next few candidates and returns one of them.
+    """
+    # Add some randomization to selection while keeping top recommendations
+    if len(ranked) >= 6:
+        # Take top 2 high-scoring recommendations and select 1 from next 4
+        top_recommendations = [rec for rec, score in ranked[:2]]
+        remaining = [rec for rec, score in ranked[2:6]]
+        if remaining:
+            top_recommendations.append(choose(remaining))
+    elif len(ranked) >= 3:
+        # Take top 2 and select 1 from remaining
+        top_recommendations = [rec for rec, score in ranked[:2]]
+        remaining = [rec for rec, score in ranked[2:]]
+        if remaining:
+            top_recommendations.append(choose(remaining))
+    else:
+        top_recommendations = [rec for rec, score in ranked[:3]]
+    return top_recommendations
+
+
+def format_recommendation(top_recommendations):
+    # Format as a comprehensive recommendation
+    if top_recommendations:
+        return ' • '.join(top_recommendations[:3])
+    return DEFAULT_RECOMMENDATION
+
+
+def get_intelligent_recommendation(education, work_status, sex, age_group, engagement_level, avg_age, rng=random):
+    """
+    Generate intelligent event/program recommendations based on demographics aligned with 17 SDGs
+    """
+    ranked = rank_recommendations(education, work_status, sex, age_group, engagement_level, avg_age)
+    return format_recommendation(pick_recommendations(ranked, rng.choice))
+
+
+def recommendation_options(ranked):
+    """Every recommendation ``pick_recommendations`` can make from ``ranked``."""
+    choices = []
+    pick_recommendations(ranked, lambda remaining: choices.extend(remaining) or remaining[0])
+    if not choices:
+        return [format_recommendation(pick_recommendations(ranked, None))]
+    return [
+        format_recommendation(pick_recommendations(ranked, lambda remaining: choice))
+        for choice in choices
+    ]
+
+
+# (age_group, age) per age band; the rules only compare age against 18, 20 and 25
+AGE_BANDS = [('Teen', 17), ('Young Adult', 19), ('Young Adult', 22), ('Adult', 25), ('Unknown', 99)]
+
+# One engagement value per band; the rules only compare against 0.5, 1.0 and 1.5
+ENGAGEMENT_BANDS = [0.0, 0.5, 1.0, 1.25, 2.0]
+
+
+def age_band(age, valid_age):
+    return np.select([~valid_age, age < 18, age < 20, age < 25], [4, 0, 1, 2], 3)
+
+
+def engagement_band(engagement):
+    return np.select([engagement < 0.5, engagement == 0.5, engagement <= 1.0, engagement <= 1.5], [0, 1, 2, 3], 4)
+
+
+class RuleTable:
+    """The rules evaluated once for every (education, work status, sex,
+    age band, engagement band) combination.
+
+    Each combination stores all the recommendations it can produce, so
+    recommending for a respondent is an index computation, not a rule run.
+    """
+
+    def __init__(self, educations, work_statuses, sexes):
+        self.educations = list(educations)
+        self.work_statuses = list(work_statuses)
+        self.sexes = list(sexes)
+        options, offsets, counts = [], [], []
+        for education in self.educations:
+            for work_status in self.work_statuses:
+                for sex in self.sexes:
+                    for age_group, age in AGE_BANDS:
+                        for engagement in ENGAGEMENT_BANDS:
+                            ranked = rank_recommendations(education, work_status, sex, age_group, engagement, age)
+                            choices = recommendation_options(ranked)
+                            offsets.append(len(options))
+                            counts.append(len(choices))
+                            options.extend(choices)
+        self.options = np.array(options, dtype=object)
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.counts = np.array(counts, dtype=np.int64)
+
+    def combination(self, education, work_status, sex, age, engagement):
+        # Row-major index into the combinations, from per-dimension codes
+        index = education
+        for code, size in ((work_status, len(self.work_statuses)), (sex, len(self.sexes)),
+                           (age, len(AGE_BANDS)), (engagement, len(ENGAGEMENT_BANDS))):
+            index = index * size + code
+        return index
+
+    def recommend(self, frame, seed=0):
+        """One recommendation per row of ``frame``.
+
+        Where a combination has several possible picks, a hash of the
+        respondent number and ``seed`` chooses, so the result is the same
+        on every run.
+        """
+        combination = self.combination(
+            frame.education.codes_for(self.educations),
+            frame.work_status.codes_for(self.work_statuses),
+            frame.sex.codes_for(self.sexes),
+            age_band(frame.age, frame.valid_age),
+            engagement_band(frame.attended + frame.voted),
+        )
+        hashes = np.array(
+            [zlib.crc32(f'{seed}:{no}'.encode()) for no in frame.respondent_no], dtype=np.int64
+        )
+        choice = hashes % self.counts[combination] if len(hashes) else hashes
+        return self.options[self.offsets[combination] + choice]
+
+
+# Compiled tables by the category values they cover
+_rule_tables = {}
+
+
+def compile_rules(frame):
+    """The RuleTable covering every category value present in ``frame``."""
+    key = tuple(tuple(c.classes.tolist()) for c in (frame.education, frame.work_status, frame.sex))
+    if key not in _rule_tables:
+        _rule_tables[key] = RuleTable(*key)
+    return _rule_tables[key]
+
+
+def assign_recommendations(seed=0):
+    """Recommend for every respondent and replace the stored recommendations."""
+    frame = load_feature_frame()
+    recommendations = compile_rules(frame).recommend(frame, seed)
+    now = datetime.utcnow()
+    rows = [
+        {'Respondent_No': str(no), 'recommendation': rec, 'ruleset': RULESET_VERSION, 'generated_at': now}
+        for no, rec in zip(frame.respondent_no, recommendations)
+    ]
+    RespondentRecommendation.query.delete()
+    if rows:
+        db.session.bulk_insert_mappings(RespondentRecommendation, rows)
+    db.session.commit()
+    return len(rows)
@@ -0,0 +1,70 @@
+# app/respondents.py
+
+from datetime import date
+from sqlalchemy.orm import joinedload
+from app import db
+from app.cache import TTLCache
+from app.data_version import table_versions
+from app.models import KKProfile, KKDemographics
+
+# Respondent records built by this worker, keyed by Respondent_No (TTL and
+# size are set from RESPONDENT_CACHE_TTL / RESPONDENT_CACHE_SIZE in create_app).
+# Each entry holds the data_version counters it was read at, and is only
+# served while they are unchanged: the counter triggers fire on every write
+# to kk_profile or kk_demographics, including imports run from other
+# processes, so a write anywhere invalidates every cached record.
+respondent_cache = TTLCache()
+
+# Cached for Respondent_Nos that do not exist; an insert bumps the
+# counters, so a new respondent is never hidden by one of these
+_NOT_FOUND = object()
+
+_PROFILE_COLUMNS = [c.name for c in KKProfile.__table__.columns]
+_DEMOGRAPHIC_COLUMNS = [c.name for c in KKDemographics.__table__.columns if c.name != 'Respondent_No']
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, date) else value
+
+
+def respondent_record(profile):
+    """Plain dict of a profile and its demographics, safe to cache and jsonify."""
+    record = {name: _value(getattr(profile, name)) for name in _PROFILE_COLUMNS}
+    demographics = profile.demographics
+    record['demographics'] = None if demographics is None else {
+        name: _value(getattr(demographics, name)) for name in _DEMOGRAPHIC_COLUMNS
+    }
+    return record
+
+
+def load_respondents(respondent_nos):
+    """Records for the given Respondent_Nos, as {Respondent_No: record}.
+
+    Nos that do not exist are left out. Whatever is not cached comes from
+    one query however many are asked for: demographics are one-to-one, so
+    they are joined in rather than fetched per profile.
+    """
+    versions = table_versions(db.session.connection())
+    records, missing = {}, []
+    for respondent_no in dict.fromkeys(respondent_nos):
+        entry = respondent_cache.get(respondent_no)
+        if entry is not None and entry[0] == versions:
+            if entry[1] is not _NOT_FOUND:
+                records[respondent_no] = entry[1]
+        else:
+            missing.append(respondent_no)
+
+    if missing:
+        profiles = (
+            KKProfile.query
+            .options(joinedload(KKProfile.demographics))
+            .filter(KKProfile.Respondent_No.in_(missing))
+            .all()
+        )
+        loaded = {profile.Respondent_No: respondent_record(profile) for profile in profiles}
+        for respondent_no in missing:
+            record = loaded.get(respondent_no, _NOT_FOUND)
+            respondent_cache.set(respondent_no, (versions, record))
+            if record is not _NOT_FOUND:
+                records[respondent_no] = record
+    return records
@@ -0,0 +1,130 @@
+# app/rollups.py
+
+from sqlalchemy import text
+from app.profile_schema import AGE_GROUPS, age_group_sql
+
+# dimension name -> SQL expression over a kk_profile / kk_demographics row.
+# ``{row}`` is replaced by the table name, ``new`` or ``old``.
+PROFILE_DIMENSIONS = {
+    'barangay': "IFNULL({row}.Barangay, '')",
+    'sex': "IFNULL({row}.Sex_Assigned_by_Birth, '')",
+    # Same CASE as the generated age_bucket column; out of range ages are
+    # NULL and not counted. Triggers evaluate it per written row only.
+    'age_group': age_group_sql('{row}.Age'),
+}
+
+DEMOGRAPHIC_DIMENSIONS = {
+    'education': "IFNULL({row}.Educational_Background, '')",
+    'work_status': "IFNULL({row}.Work_Status, '')",
+}
+
+# NULL cannot take part in the primary key, so it is stored as ''
+ROLLUP_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS dashboard_rollup (
+        dimension VARCHAR(20) NOT NULL,
+        value VARCHAR(100) NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (dimension, value)
+    )
+"""
+
+
+def _dimension_rows(dimensions, row):
+    return ' UNION ALL '.join(
+        f"SELECT '{name}' AS dimension, {expression.format(row=row)} AS value"
+        for name, expression in dimensions.items()
+    )
+
+
+def _increment(dimensions, row):
+    return f"""
+        INSERT INTO dashboard_rollup (dimension, value, count)
+        SELECT dimension, value, 1 FROM ({_dimension_rows(dimensions, row)}) WHERE value IS NOT NULL
+        ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+    """
+
+
+def _decrement(dimensions, row):
+    return f"""
+        UPDATE dashboard_rollup SET count = count - 1
+        WHERE (dimension, value) IN (SELECT dimension, value FROM ({_dimension_rows(dimensions, row)}));
+        DELETE FROM dashboard_rollup WHERE count <= 0;
+    """
+
+
+def _triggers(table, prefix, dimensions, columns):
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {prefix}_rollup_ai AFTER INSERT ON {table} BEGIN
+            {_increment(dimensions, 'new')}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {prefix}_rollup_ad AFTER DELETE ON {table} BEGIN
+            {_decrement(dimensions, 'old')}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {prefix}_rollup_au AFTER UPDATE OF {', '.join(columns)} ON {table} BEGIN
+            {_decrement(dimensions, 'old')}
+            {_increment(dimensions, 'new')}
+        END
+        """,
+    ]
+
+
+ROLLUP_DDL = [ROLLUP_TABLE_DDL] + _triggers(
+    'kk_profile', 'kk_profile', PROFILE_DIMENSIONS, ['Barangay', 'Sex_Assigned_by_Birth', 'Age']
+) + _triggers(
+    'kk_demographics', 'kk_demographics', DEMOGRAPHIC_DIMENSIONS, ['Educational_Background', 'Work_Status']
+)
+
+DROP_ROLLUP_DDL = [
+    f"DROP TRIGGER IF EXISTS {prefix}_rollup_{event}"
+    for prefix in ('kk_profile', 'kk_demographics')
+    for event in ('ai', 'ad', 'au')
+] + ["DROP TABLE IF EXISTS dashboard_rollup"]
+
+
+def install_rollups(connection):
+    """Create the rollup table and its maintenance triggers if missing."""
+    for statement in ROLLUP_DDL:
+        connection.execute(text(statement))
+
+
+def rebuild_rollups(connection):
+    """Recount every dimension from the base tables.
+
+    Only needed after a bulk reload; row-level writes keep the counts
+    current through the triggers.
+    """
+    install_rollups(connection)
+    connection.execute(text("DELETE FROM dashboard_rollup"))
+    for table, dimensions in (('kk_profile', PROFILE_DIMENSIONS), ('kk_demographics', DEMOGRAPHIC_DIMENSIONS)):
+        for name, expression in dimensions.items():
+            value = expression.format(row=table)
+            connection.execute(text(f"""
+                INSERT INTO dashboard_rollup (dimension, value, count)
+                SELECT '{name}', {value}, COUNT(*) FROM {table}
+                WHERE {value} IS NOT NULL
+                GROUP BY {value}
+            """))
+
+
+def read_rollup_counts(connection):
+    """Return the dashboard counts in the same shape as ``dashboard_counts()``.
+
+    Reads one row per group, so the cost does not depend on the number of
+    respondents.
+    """
+    counts = {name: [] for name in list(PROFILE_DIMENSIONS) + list(DEMOGRAPHIC_DIMENSIONS)}
+    rows = connection.execute(text(
+        "SELECT dimension, value, count FROM dashboard_rollup ORDER BY dimension, value"
+    ))
+    for dimension, value, count in rows:
+        if dimension in counts:
+            counts[dimension].append((value if value != '' else None, count))
+
+    age_groups = dict(counts['age_group'])
+    counts['age_group'] = [(group, age_groups.get(group, 0)) for group in AGE_GROUPS]
+    return counts
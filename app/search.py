@@ -0,0 +1,100 @@
+# app/search.py
+
+import re
+from sqlalchemy import text
+
+# External content FTS5 index over kk_profile. The rows themselves stay in
+# kk_profile; the index only stores the tokens, keyed by kk_profile.rowid.
+# prefix='1 2 3' keeps short prefix queries ("Re*") as index lookups.
+SEARCH_INDEX_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS kk_profile_fts USING fts5(
+        Respondent_No, First_Name, Last_Name, Barangay,
+        content='kk_profile', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS kk_profile_fts_ai AFTER INSERT ON kk_profile BEGIN
+        INSERT INTO kk_profile_fts(rowid, Respondent_No, First_Name, Last_Name, Barangay)
+        VALUES (new.rowid, new.Respondent_No, new.First_Name, new.Last_Name, new.Barangay);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS kk_profile_fts_ad AFTER DELETE ON kk_profile BEGIN
+        INSERT INTO kk_profile_fts(kk_profile_fts, rowid, Respondent_No, First_Name, Last_Name, Barangay)
+        VALUES ('delete', old.rowid, old.Respondent_No, old.First_Name, old.Last_Name, old.Barangay);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS kk_profile_fts_au AFTER UPDATE OF Respondent_No, First_Name, Last_Name, Barangay ON kk_profile BEGIN
+        INSERT INTO kk_profile_fts(kk_profile_fts, rowid, Respondent_No, First_Name, Last_Name, Barangay)
+        VALUES ('delete', old.rowid, old.Respondent_No, old.First_Name, old.Last_Name, old.Barangay);
+        INSERT INTO kk_profile_fts(rowid, Respondent_No, First_Name, Last_Name, Barangay)
+        VALUES (new.rowid, new.Respondent_No, new.First_Name, new.Last_Name, new.Barangay);
+    END
+    """,
+]
+
+DROP_SEARCH_INDEX_DDL = [
+    "DROP TRIGGER IF EXISTS kk_profile_fts_au",
+    "DROP TRIGGER IF EXISTS kk_profile_fts_ad",
+    "DROP TRIGGER IF EXISTS kk_profile_fts_ai",
+    "DROP TABLE IF EXISTS kk_profile_fts",
+]
+
+# bm25 column weights: an exact respondent number or name hit outranks a barangay hit
+RANK_WEIGHTS = (10.0, 5.0, 5.0, 1.0)
+
+MATCH_SUBQUERY = "SELECT rowid FROM kk_profile_fts WHERE kk_profile_fts MATCH :match"
+
+
+def install_search_index(connection):
+    """Create the FTS table and its sync triggers if they are missing."""
+    for statement in SEARCH_INDEX_DDL:
+        connection.execute(text(statement))
+
+
+def rebuild_search_index(connection):
+    """Re-read every kk_profile row into the index.
+
+    Needed after kk_profile is dropped and reloaded (the triggers go with
+    the table) or after a VACUUM that renumbers rowids.
+    """
+    install_search_index(connection)
+    connection.execute(text("INSERT INTO kk_profile_fts(kk_profile_fts) VALUES ('rebuild')"))
+
+
+def build_match_expression(term):
+    # Every word must match as a prefix; quoting keeps FTS5 syntax characters inert
+    tokens = re.findall(r'\w+', term or '')
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def filter_by_search(query, term, model):
+    """Restrict a ``model`` query to rows whose indexed columns match ``term``."""
+    match = build_match_expression(term)
+    if not match:
+        return query.filter(text('0'))
+    table = model.__tablename__
+    return query.filter(text(f"{table}.rowid IN ({MATCH_SUBQUERY})")).params(match=match)
+
+
+def ranked_matches(connection, term, limit=20):
+    """Return the indexed columns and bm25 score for ``term``, best match first."""
+    match = build_match_expression(term)
+    if not match:
+        return []
+    weights = ', '.join(str(w) for w in RANK_WEIGHTS)
+    rows = connection.execute(
+        text(f"""
+            SELECT Respondent_No, First_Name, Last_Name, Barangay,
+                   bm25(kk_profile_fts, {weights}) AS score
+            FROM kk_profile_fts
+            WHERE kk_profile_fts MATCH :match
+            ORDER BY score
+            LIMIT :limit
+        """),
+        {'match': match, 'limit': limit}
+    )
+    return rows.all()
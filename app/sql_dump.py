@@ -0,0 +1,315 @@
+# app/sql_dump.py
+
+import re
+import time
+
+# One lexical token of a MySQL dump. Quoted strings and comments are
+# matched whole, so a ';' inside them never ends a statement. ``open``
+# only matches when a string or comment is cut off at the end of the
+# buffer, meaning more input is needed. Quoted strings are written as
+# "unrolled loops" (a run of plain characters, then any number of escapes
+# each followed by another run), so there is only one way to match them
+# and an unterminated string fails in linear time.
+_TOKEN = re.compile(r"""
+    (?P<string>'[^'\\]*(?:(?:\\.|'')[^'\\]*)*'|"[^"\\]*(?:(?:\\.|"")[^"\\]*)*")
+  | (?P<ident>`[^`]*`)
+  | (?P<comment>--[^\n]*\n|\#[^\n]*\n|/\*.*?\*/)
+  | (?P<end>;)
+  | (?P<open>['"`]|--|\#|/\*)
+  | (?P<text>[^'"`;\-\#/]+|[-/])
+""", re.S | re.X)
+
+# Values inside INSERT ... VALUES (...), (...)
+_VALUE = re.compile(r"""
+    '(?P<string>[^'\\]*(?:(?:\\.|'')[^'\\]*)*)'
+  | (?P<null>NULL)\b
+  | (?P<number>[-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)
+  | (?P<open>\()
+  | (?P<close>\))
+  | (?P<comma>,)
+  | (?P<space>\s+)
+""", re.X | re.I)
+
+_ESCAPES = {'0': '\0', 'b': '\b', 'n': '\n', 'r': '\r', 't': '\t', 'Z': '\x1a'}
+_ESCAPE = re.compile(r"\\(.)|''", re.S)
+
+_INSERT = re.compile(
+    r'^\s*(?P<verb>INSERT|REPLACE)\s+(?:IGNORE\s+)?INTO\s+(?P<table>"[^"]+"|\w+)\s*'
+    r'(?P<columns>\([^)]*\))?\s*VALUES\s*(?P<values>.*)$',
+    re.I | re.S
+)
+_CREATE_TABLE = re.compile(r'^\s*CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(?P<table>"[^"]+"|\w+)', re.I)
+_ALTER_TABLE = re.compile(r'^\s*ALTER\s+TABLE\s+(?P<table>"[^"]+"|\w+)\s+(?P<actions>.*)$', re.I | re.S)
+_INDEX_CLAUSE = re.compile(
+    r'^(?:ADD\s+)?(?P<kind>PRIMARY\s+KEY|UNIQUE\s+(?:KEY|INDEX)|KEY|INDEX)\b\s*(?P<name>"[^"]+"|\w+)?\s*(?P<columns>\(.*\))',
+    re.I | re.S
+)
+# Session and transaction statements that mean nothing to SQLite
+_SKIPPED = re.compile(r'^\s*(SET|START\s+TRANSACTION|BEGIN|COMMIT|ROLLBACK|LOCK\s+TABLES|UNLOCK\s+TABLES)\b', re.I)
+
+# MySQL column type and option rewrites for CREATE TABLE bodies
+_TYPE_REWRITES = [
+    (re.compile(r'\b(?:tiny|small|medium|big)?int\s*\(\d+\)(?:\s+unsigned)?(?:\s+zerofill)?', re.I), 'INTEGER'),
+    (re.compile(r'\b(?:var)?char\s*\(\d+\)', re.I), 'TEXT'),
+    (re.compile(r'\b(?:tiny|medium|long)text\b', re.I), 'TEXT'),
+    (re.compile(r'\bAUTO_INCREMENT\b', re.I), ''),
+    (re.compile(r'\b(?:CHARACTER\s+SET|CHARSET)\s+\w+', re.I), ''),
+    (re.compile(r'\bCOLLATE\s+\w+', re.I), ''),
+    (re.compile(r'\bON\s+UPDATE\s+CURRENT_TIMESTAMP(?:\(\))?', re.I), ''),
+    (re.compile(r'\bCURRENT_TIMESTAMP\(\)', re.I), 'CURRENT_TIMESTAMP'),
+]
+
+
+def iter_statements(stream, chunk_size=1 << 16):
+    """Yield the statements of a SQL dump one at a time, without the ';'.
+
+    Reads ``stream`` in chunks, so only the current statement is held in
+    memory. Comments are dropped and MySQL backtick identifiers become
+    standard double-quoted ones. Quotes and backslash escapes are honoured,
+    so semicolons inside values do not split statements.
+    """
+    buffer = ''
+    parts = []
+    eof = False
+    while not eof:
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+        pos = 0
+        while pos < len(buffer):
+            match = _TOKEN.match(buffer, pos)
+            kind = match.lastgroup
+            # A token that runs to the end of the buffer may continue in the
+            # next chunk ('ab' + 'cd', '-' + '- comment', 'x' + ''y'), so it
+            # is scanned again once more input has arrived
+            if not eof and (kind == 'open' or match.end() == len(buffer)):
+                break
+            if kind == 'open':
+                if match.group() in ('--', '#'):
+                    # A trailing line comment without a newline
+                    pos = len(buffer)
+                    continue
+                raise ValueError(f"Unterminated {match.group()} in statement: {buffer[pos:pos + 100]!r}")
+            pos = match.end()
+            if kind == 'end':
+                statement = ''.join(parts).strip()
+                if statement:
+                    yield statement
+                parts = []
+            elif kind == 'ident':
+                parts.append('"' + match.group()[1:-1].replace('"', '""') + '"')
+            elif kind == 'comment':
+                # Keep token boundaries: "a/* x */b" is two tokens
+                parts.append(' ')
+            else:
+                parts.append(match.group())
+        # Only the possibly unfinished last token is carried over
+        buffer = buffer[pos:]
+    statement = ''.join(parts).strip()
+    if statement:
+        yield statement
+
+
+def _unescape(value):
+    return _ESCAPE.sub(lambda m: "'" if m.group() == "''" else _ESCAPES.get(m.group(1), m.group(1)), value)
+
+
+def parse_values(text):
+    """Rows of a VALUES list as tuples, or None if it holds anything but literals."""
+    rows = []
+    row = None
+    pos = 0
+    while pos < len(text):
+        match = _VALUE.match(text, pos)
+        if match is None:
+            return None
+        pos = match.end()
+        kind = match.lastgroup
+        if kind == 'open':
+            if row is not None:
+                return None
+            row = []
+        elif kind == 'close':
+            if row is None:
+                return None
+            rows.append(tuple(row))
+            row = None
+        elif kind in ('comma', 'space'):
+            continue
+        elif row is None:
+            return None
+        elif kind == 'string':
+            row.append(_unescape(match.group('string')))
+        elif kind == 'null':
+            row.append(None)
+        else:
+            number = match.group()
+            row.append(float(number) if any(c in number for c in '.eE') else int(number))
+    return rows if row is None else None
+
+
+def _split_top_level(text):
+    # Split on commas outside parentheses and quotes
+    parts, depth, current = [], 0, []
+    for match in re.finditer(r"'(?:[^'\\]|\\.|'')*'|\"[^\"]*\"|[(),]|[^'\"(),]+", text, re.S):
+        token = match.group()
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        elif token == ',' and depth == 0:
+            parts.append(''.join(current).strip())
+            current = []
+            continue
+        current.append(token)
+    if current:
+        parts.append(''.join(current).strip())
+    return parts
+
+
+def _index_statement(table, clause):
+    """CREATE INDEX for a MySQL key clause, or None if it is not one.
+
+    SQLite cannot add a primary key to an existing table, so PRIMARY KEY
+    becomes a unique index, which enforces the same thing.
+    """
+    match = _INDEX_CLAUSE.match(clause.strip())
+    if match is None:
+        return None
+    kind = match.group('kind').upper()
+    columns = re.sub(r'\(\d+\)', '', match.group('columns'))  # drop prefix lengths
+    if kind.startswith('PRIMARY'):
+        name = 'pk'
+    else:
+        name = (match.group('name') or 'idx').strip('"')
+    unique = 'UNIQUE ' if kind.startswith(('PRIMARY', 'UNIQUE')) else ''
+    index = f'"ix_{table.strip(chr(34))}_{name}"'
+    return f"CREATE {unique}INDEX IF NOT EXISTS {index} ON {table} {columns}"
+
+
+def _translate_create(statement, table):
+    body_start = statement.index('(')
+    body_end = statement.rindex(')')
+    columns, indexes = [], []
+    for part in _split_top_level(statement[body_start + 1:body_end]):
+        index = _index_statement(table, part) if not part.upper().startswith('PRIMARY') else None
+        if index is not None:
+            indexes.append(index)
+            continue
+        if re.match(r'^(?:CONSTRAINT\b.*)?FOREIGN\s+KEY\b|^CONSTRAINT\b', part, re.I):
+            continue
+        for pattern, replacement in _TYPE_REWRITES:
+            part = pattern.sub(replacement, part)
+        columns.append(re.sub(r'\s+', ' ', part).strip())
+    # Table options after the closing parenthesis (ENGINE=..., CHARSET=...) are dropped
+    create = f"CREATE TABLE {table} (\n  " + ',\n  '.join(columns) + "\n)"
+    return [f"DROP TABLE IF EXISTS {table}", create] + indexes
+
+
+def translate(statement):
+    """Turn one MySQL dump statement into SQLite work.
+
+    Returns a list of ``(sql, rows)`` pairs: ``rows`` is None for a plain
+    statement, or a list of parameter tuples for an INSERT to run with
+    executemany. Statements SQLite has no use for translate to [].
+    """
+    if _SKIPPED.match(statement):
+        return []
+
+    insert = _INSERT.match(statement)
+    if insert:
+        rows = parse_values(insert.group('values'))
+        if rows:
+            width = len(rows[0])
+            if all(len(row) == width for row in rows):
+                verb = 'INSERT OR REPLACE' if insert.group('verb').upper() == 'REPLACE' else 'INSERT'
+                placeholders = ', '.join('?' * width)
+                sql = f"{verb} INTO {insert.group('table')} {insert.group('columns') or ''} VALUES ({placeholders})"
+                return [(sql, rows)]
+        return [(statement, None)]
+
+    create = _CREATE_TABLE.match(statement)
+    if create:
+        return [(sql, None) for sql in _translate_create(statement, create.group('table'))]
+
+    alter = _ALTER_TABLE.match(statement)
+    if alter:
+        # Keys become indexes; MODIFY/CHANGE and foreign keys have no SQLite form
+        indexes = [_index_statement(alter.group('table'), clause) for clause in _split_top_level(alter.group('actions'))]
+        return [(sql, None) for sql in indexes if sql]
+
+    return [(statement, None)]
+
+
+def created_table(sql):
+    """Name of the table a CREATE TABLE statement creates, or None."""
+    create = _CREATE_TABLE.match(sql)
+    return create.group('table').strip('"') if create else None
+
+
+def _column_names(statement):
+    # Column names of a CREATE TABLE, in order, skipping key/constraint clauses
+    body = statement[statement.index('(') + 1:statement.rindex(')')]
+    names = []
+    for part in _split_top_level(body):
+        if re.match(r'^(?:PRIMARY|UNIQUE|KEY|INDEX|CONSTRAINT|FOREIGN|CHECK)\b', part, re.I):
+            continue
+        names.append(part.split()[0].strip('"'))
+    return names
+
+
+def iter_table_rows(stream, tables=None):
+    """Yield ``(table, columns, rows)`` for each INSERT in a SQL dump.
+
+    Only INSERTs into ``tables`` (all tables if None) are returned, with
+    every other statement ignored. ``columns`` comes from the INSERT's own
+    column list, or from the dump's CREATE TABLE when it has none.
+    """
+    created = {}
+    for statement in iter_statements(stream):
+        create = _CREATE_TABLE.match(statement)
+        if create:
+            created[create.group('table').strip('"')] = _column_names(statement)
+            continue
+        insert = _INSERT.match(statement)
+        if insert is None:
+            continue
+        table = insert.group('table').strip('"')
+        if tables is not None and table not in tables:
+            continue
+        if insert.group('columns'):
+            columns = [name.strip().strip('"') for name in insert.group('columns')[1:-1].split(',')]
+        elif table in created:
+            columns = created[table]
+        else:
+            raise ValueError(f"INSERT into {table} has no column list and no CREATE TABLE to take one from")
+        rows = parse_values(insert.group('values'))
+        if rows is None:
+            raise ValueError(f"INSERT into {table} has values other than literals")
+        yield table, columns, rows
+
+
+def load_dump(connection, stream, batch_size=1000, progress=None):
+    """Execute a SQL dump on a DBAPI ``connection`` and return load stats.
+
+    INSERT rows go through executemany in batches of ``batch_size``. The
+    caller owns the transaction, so a dump either loads completely or not
+    at all. ``progress`` is called with the stats after every statement.
+    """
+    cursor = connection.cursor()
+    stats = {'statements': 0, 'rows': 0, 'seconds': 0.0}
+    started = time.perf_counter()
+    for statement in iter_statements(stream):
+        for sql, rows in translate(statement):
+            if rows is None:
+                cursor.execute(sql)
+                continue
+            for start in range(0, len(rows), batch_size):
+                cursor.executemany(sql, rows[start:start + batch_size])
+            stats['rows'] += len(rows)
+        stats['statements'] += 1
+        stats['seconds'] = time.perf_counter() - started
+        if progress:
+            progress(stats)
+    stats['seconds'] = time.perf_counter() - started
+    return stats
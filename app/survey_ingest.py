@@ -0,0 +1,251 @@
+# app/survey_ingest.py
+
+import csv
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from sqlalchemy import Date, Integer, String, text
+from app.dates import parse_date
+from app.models import KKProfile, KKDemographics
+
+# openpyxl is only needed for .xlsx batches
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+# Columns answered Yes/No in the survey, and the spellings we accept
+FLAG_COLUMNS = {
+    'Registered_SK_Voter', 'Registered_National_Voter',
+    'Attended_KK_Assembly', 'Did_you_vote_last_SK_election',
+}
+FLAG_VALUES = {
+    'yes': 'Yes', 'y': 'Yes', 'true': 'Yes', '1': 'Yes',
+    'no': 'No', 'n': 'No', 'false': 'No', '0': 'No',
+}
+
+KEY = 'Respondent_No'
+
+
+def _column_specs(model):
+    # name -> (kind, max length) from the model's column definitions
+    specs = {}
+    for column in model.__table__.columns:
+        if column.computed is not None:
+            # Generated by the database (age_bucket); an export's copy is ignored
+            continue
+        if column.name in FLAG_COLUMNS:
+            kind = 'flag'
+        elif isinstance(column.type, Date):
+            kind = 'date'
+        elif isinstance(column.type, Integer):
+            kind = 'int'
+        else:
+            kind = 'str'
+        length = column.type.length if isinstance(column.type, String) else None
+        specs[column.name] = (kind, length)
+    return specs
+
+
+PROFILE_SPECS = _column_specs(KKProfile)
+DEMOGRAPHIC_SPECS = _column_specs(KKDemographics)
+
+
+def _header_key(name):
+    return str(name or '').strip().lower().replace(' ', '_').replace('-', '_')
+
+
+def map_header(header):
+    """Column name for each header cell (None for columns we do not know)."""
+    known = {_header_key(name): name for name in list(PROFILE_SPECS) + list(DEMOGRAPHIC_SPECS)}
+    return [known.get(_header_key(cell)) for cell in header]
+
+
+def coerce(name, kind, length, value):
+    """Return the stored form of one cell, or raise ValueError."""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # spreadsheets hand whole numbers over as floats
+    if isinstance(value, (datetime, date)):
+        value = value.strftime('%Y-%m-%d')
+    value = '' if value is None else str(value).strip()
+    if value == '':
+        if name == KEY:
+            raise ValueError(f"{name} is required")
+        return None
+    if kind == 'flag':
+        if value.lower() not in FLAG_VALUES:
+            raise ValueError(f"{name} must be Yes or No, got {value!r}")
+        return FLAG_VALUES[value.lower()]
+    if kind == 'int':
+        try:
+            return int(value)
+        except ValueError:
+            raise ValueError(f"{name} must be a whole number, got {value!r}") from None
+    if kind == 'date':
+        iso = parse_date(value)
+        if iso is None:
+            raise ValueError(f"{name} must be a dd/mm/yyyy date, got {value!r}")
+        return iso
+    if length is not None and len(value) > length:
+        raise ValueError(f"{name} is longer than {length} characters")
+    return value
+
+
+def validate_chunk(columns, rows, first_line):
+    """Validate and coerce a chunk of rows (runs in a pool process).
+
+    Returns ``(profiles, demographics, rejects)``: dicts ready to upsert
+    and ``(line, Respondent_No, errors)`` tuples for rows that failed.
+    """
+    profiles, demographics, rejects = [], [], []
+    key_index = columns.index(KEY) if KEY in columns else None
+    for line, row in enumerate(rows, start=first_line):
+        profile, demographic, errors = {}, {}, []
+        for name, value in zip(columns, row):
+            if name is None:
+                continue
+            for specs, target in ((PROFILE_SPECS, profile), (DEMOGRAPHIC_SPECS, demographic)):
+                if name in specs:
+                    try:
+                        target[name] = coerce(name, *specs[name], value)
+                    except ValueError as e:
+                        errors.append(str(e))
+                        break
+        if KEY not in profile and not errors:
+            errors.append(f"{KEY} is required")
+        if errors:
+            raw_key = row[key_index] if key_index is not None and key_index < len(row) else None
+            rejects.append((line, '' if raw_key is None else str(raw_key).strip(), '; '.join(dict.fromkeys(errors))))
+            continue
+        profiles.append(profile)
+        if any(value is not None for name, value in demographic.items() if name != KEY):
+            demographic[KEY] = profile[KEY]
+            demographics.append(demographic)
+    return profiles, demographics, rejects
+
+
+def iter_chunks(path, chunk_size):
+    """Yield ``(header, rows, first_line)`` chunks of a .csv or .xlsx file."""
+    if path.lower().endswith('.xlsx'):
+        if openpyxl is None:
+            raise RuntimeError("Reading .xlsx files needs openpyxl (pip install openpyxl)")
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+    else:
+        f = open(path, newline='', encoding='utf-8-sig')
+        rows = csv.reader(f)
+    try:
+        header = next(rows, None)
+        if header is None:
+            return
+        chunk, first_line = [], 2
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield header, chunk, first_line
+                first_line += len(chunk)
+                chunk = []
+        if chunk:
+            yield header, chunk, first_line
+    finally:
+        if path.lower().endswith('.xlsx'):
+            workbook.close()
+        else:
+            f.close()
+
+
+def _table_columns(connection, table):
+    return [row[1] for row in connection.execute(text(f"PRAGMA table_info({table})"))]
+
+
+def upsert(connection, table, rows):
+    """Insert or update ``rows`` (dicts keyed by column) by Respondent_No.
+
+    The base tables have no unique constraint on Respondent_No, so rows
+    go through a temp staging table: one UPDATE ... FROM for the
+    respondents we already have and one INSERT ... SELECT for the rest.
+    Returns ``(inserted, updated)``.
+    """
+    if not rows:
+        return 0, 0
+    columns = list(dict.fromkeys(name for row in rows for name in row))
+    non_key = [c for c in columns if c != KEY]
+    connection.execute(text("DROP TABLE IF EXISTS temp.ingest_staging"))
+    connection.execute(text(
+        f"CREATE TEMP TABLE ingest_staging ({KEY} TEXT PRIMARY KEY, {', '.join(non_key)})"
+    ))
+    # INSERT OR REPLACE: the last row of a batch wins for duplicate respondents
+    connection.execute(
+        text(f"INSERT OR REPLACE INTO ingest_staging ({', '.join(columns)}) "
+             f"VALUES ({', '.join(':' + c for c in columns)})"),
+        [{c: row.get(c) for c in columns} for row in rows]
+    )
+
+    updated = 0
+    if non_key:
+        assignments = ', '.join(f"{c} = s.{c}" for c in non_key)
+        updated = connection.execute(text(
+            f"UPDATE {table} SET {assignments} FROM ingest_staging s WHERE {table}.{KEY} = s.{KEY}"
+        )).rowcount
+
+    insert_columns, select_columns = list(columns), [f"s.{c}" for c in columns]
+    table_columns = _table_columns(connection, table)
+    if 'respondent_id' in table_columns and 'respondent_id' not in columns:
+        if table == 'kk_profile':
+            # respondent_id is not always an auto-assigned rowid alias (dump
+            # loads keep it as a plain NOT NULL column), so number new rows here
+            next_id = connection.execute(text("SELECT IFNULL(MAX(respondent_id), 0) FROM kk_profile")).scalar()
+            select_columns.append(f"{next_id} + ROW_NUMBER() OVER (ORDER BY s.{KEY})")
+        else:
+            select_columns.append(f"(SELECT p.respondent_id FROM kk_profile p WHERE p.{KEY} = s.{KEY})")
+        insert_columns.append('respondent_id')
+    inserted = connection.execute(text(
+        f"INSERT INTO {table} ({', '.join(insert_columns)}) "
+        f"SELECT {', '.join(select_columns)} FROM ingest_staging s "
+        f"WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE t.{KEY} = s.{KEY})"
+    )).rowcount
+    connection.execute(text("DROP TABLE temp.ingest_staging"))
+    return inserted, updated
+
+
+def ingest(engine, path, rejects_path, workers=None, chunk_size=5000, log=print):
+    """Validate ``path`` in a process pool and upsert the valid rows.
+
+    Chunks are validated in parallel while the previous ones are written;
+    each chunk is upserted in its own transaction. Rejected rows are written
+    to ``rejects_path`` as CSV (line, Respondent_No, errors). Returns a
+    dict of counts.
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = {'rows': 0, 'inserted': 0, 'updated': 0, 'rejected': 0}
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor, \
+            open(rejects_path, 'w', newline='', encoding='utf-8') as rejects_file:
+        rejects = csv.writer(rejects_file)
+        rejects.writerow(['line', KEY, 'errors'])
+        in_flight = deque()
+        chunks = iter_chunks(path, chunk_size)
+
+        def write(future):
+            profiles, demographics, rejected = future.result()
+            with engine.begin() as connection:
+                for table, rows in (('kk_profile', profiles), ('kk_demographics', demographics)):
+                    inserted, updated = upsert(connection, table, rows)
+                    if table == 'kk_profile':
+                        stats['inserted'] += inserted
+                        stats['updated'] += updated
+            rejects.writerows(rejected)
+            stats['rows'] += len(profiles) + len(rejected)
+            stats['rejected'] += len(rejected)
+            log(f"{stats['rows']} rows processed")
+
+        for header, rows, first_line in chunks:
+            # Keep a bounded number of chunks queued so memory stays flat
+            in_flight.append(executor.submit(validate_chunk, map_header(header), rows, first_line))
+            if len(in_flight) > workers * 2:
+                write(in_flight.popleft())
+        while in_flight:
+            write(in_flight.popleft())
+    return stats
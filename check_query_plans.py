@@ -0,0 +1,233 @@
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+from urllib.parse import parse_qsl, urlsplit
+
+from sqlalchemy import event, text
+
+from app.sql_dump import iter_statements, translate
+
+# Query-plan regression check: builds a synthetic database of --rows
+# respondents, requests every route below and runs EXPLAIN QUERY PLAN on
+# each statement the route issued. A route fails the check when a
+# statement scans a respondent table (a plain "SCAN <table>", or a
+# "SCAN <table> USING INDEX" that walks the whole index instead of a SEARCH
+# range), sorts or groups in a temp B-tree, or when the route issues more
+# statements than its budget, so a route change that loses its index or
+# starts lazy loading per row shows up here. Scans and temp B-trees that
+# are the point of a query are allowed per request shape below.
+
+# Tables big enough that a full scan matters
+LARGE_TABLES = {'kk_profile', 'kk_demographics', 'respondent_features', 'respondent_cluster',
+                'respondent_recommendation', 'row_hashes'}
+
+# Dump files whose CREATE TABLE statements give the real base table schema
+SCHEMA_DUMPS = ('profile.sql', 'demo.sql')
+
+# (request shape, table or index) scans that are the point of the query.
+# A request shape is the path plus its sorted query argument names, so
+# '/?search' is allowed what it needs without '/' inheriting it.
+ALLOWED_SCANS = {
+    # Clustering reads every respondent once, so one table has to drive the join
+    ('/clustering_model', 'respondent_features'),
+    ('/clustering_model', 'kk_profile'),
+    ('/clustering_model', 'kk_demographics'),
+    # The first page has no cursor to SEARCH from: it walks the key index
+    # in order and stops at the LIMIT
+    ('/', 'ix_kk_profile_respondent_no'),
+    ('/data-table', 'ix_kk_profile_respondent_no'),
+    # Filter dropdowns: DISTINCT over a covering index, no table rows read
+    ('/', 'ix_kk_profile_barangay'),
+    ('/?after', 'ix_kk_profile_barangay'),
+    ('/?before', 'ix_kk_profile_barangay'),
+    ('/?search', 'ix_kk_profile_barangay'),
+    ('/data-table', 'ix_kk_profile_region'),
+    ('/data-table?after&region', 'ix_kk_profile_region'),
+    ('/data-table?before&region', 'ix_kk_profile_region'),
+    ('/data-table?region&search', 'ix_kk_profile_region'),
+    # The fallback dashboard groups every respondent; rollups are the fast path
+    ('/dashboard?fallback', 'ix_kk_profile_barangay'),
+    ('/dashboard?fallback', 'ix_kk_demographics_education'),
+}
+
+# (request shape, temp B-tree step) sorts that are the point of the query:
+# full-text matches come back in rowid order and are sorted, by key or by
+# rank, only once the MATCH has cut them down
+ALLOWED_TEMP_BTREES = {
+    ('/?search', 'ORDER BY'),
+    ('/data-table?region&search', 'ORDER BY'),
+    ('/search?q', 'ORDER BY'),
+}
+
+# SELECTs a request may issue; more than this usually means a lazy load per row
+STATEMENT_BUDGET = 3
+ROUTE_STATEMENT_BUDGETS = {
+    # Cache lookups on data_version around the clustering run and its writes
+    '/clustering_model': 12,
+}
+
+REGIONS = ['CALABARZON', 'NCR', 'Central Luzon', 'Bicol Region', 'Western Visayas']
+BARANGAYS = [f'Barangay {i}' for i in range(1, 41)]
+EDUCATION = ['Elementary Graduate', 'High school undergraduate', 'High school graduate',
+             'College undergraduate', 'College graduate']
+WORK_STATUS = ['Employed', 'Unemployed', 'Self-Employed', 'Currently looking for a job']
+YES_NO = ['Yes', 'No']
+
+# "SCAN t", "SCAN t USING INDEX i" and "SCAN t USING COVERING INDEX i"
+_SCAN = re.compile(r'^SCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?$')
+_TEMP_BTREE = re.compile(r'USE TEMP B-TREE FOR (.+)$')
+
+
+def request_shape(url):
+    """Path plus sorted query argument names: '/data-table?region=NCR&after=5' -> '/data-table?after&region'."""
+    parts = urlsplit(url)
+    names = sorted(name for name, _ in parse_qsl(parts.query))
+    return parts.path + ('?' + '&'.join(names) if names else '')
+
+
+def route_requests(rows):
+    """Requests to check, chosen to hit every filter and cursor branch."""
+    middle = str(100000 + rows // 2)
+    return [
+        '/',
+        f'/?after={middle}',
+        f'/?before={middle}',
+        '/?search=Reyes',
+        '/data-table',
+        f'/data-table?region=NCR&after={middle}',
+        f'/data-table?region=NCR&before={middle}',
+        '/data-table?search=Cruz&region=NCR',
+        '/export?format=csv&region=NCR',
+        '/search?q=Rey',
+        f'/respondent/{middle}',
+        f'/respondents?ids={middle},{int(middle) + 1},{int(middle) + 2}',
+        '/dashboard',
+        '/dashboard?fallback=1',
+        '/clustering_model',
+    ]
+
+
+def create_base_tables(connection):
+    for path in SCHEMA_DUMPS:
+        with open(path, 'r', encoding='utf-8') as f:
+            for statement in iter_statements(f):
+                for sql, rows in translate(statement):
+                    if rows is None and not sql.upper().startswith('INSERT'):
+                        connection.exec_driver_sql(sql)
+
+
+def fill_synthetic(connection, rows, seed=0):
+    rng = random.Random(seed)
+    profiles, demographics = [], []
+    for i in range(rows):
+        no = str(100000 + i)
+        age = rng.randint(15, 30)
+        profiles.append((i + 1, no, '2025-03-24', rng.choice(['Reyes', 'Cruz', 'Santos', 'Bautista']),
+                         'M', rng.choice(['Ana', 'Jose', 'Luis', 'Maria']), None,
+                         rng.choice(REGIONS), 'Batangas', 'San Jose', rng.choice(BARANGAYS),
+                         rng.choice(['Male', 'Female']), str(age), '2000-01-01', None, None))
+        demographics.append((no, 'Single', 'In School Youth', None, rng.choice(WORK_STATUS),
+                             rng.choice(EDUCATION), rng.choice(YES_NO), rng.choice(YES_NO),
+                             rng.choice(YES_NO), rng.choice(YES_NO), None, None, i + 1))
+    connection.exec_driver_sql(
+        f"INSERT INTO kk_profile VALUES ({', '.join('?' * 16)})", profiles)
+    connection.exec_driver_sql(
+        f"INSERT INTO kk_demographics VALUES ({', '.join('?' * 13)})", demographics)
+
+
+def explain(connection, statement, parameters):
+    return [row[3] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+
+def plan_problem(shape, line):
+    """What is wrong with one EXPLAIN QUERY PLAN line of a request, or None."""
+    match = _SCAN.match(line)
+    if match and match.group(1) in LARGE_TABLES:
+        table, index = match.groups()
+        if (shape, index or table) in ALLOWED_SCANS:
+            return None
+        return f"scan of {table} via {index}" if index else f"full scan of {table}"
+    match = _TEMP_BTREE.search(line)
+    if match and (shape, match.group(1)) not in ALLOWED_TEMP_BTREES:
+        return f"temp B-tree for {match.group(1)}"
+    return None
+
+
+def check_plans(rows, verbose=False):
+    from flask_migrate import stamp, upgrade
+    from app import create_app, db
+    from app.models import User
+
+    workdir = tempfile.mkdtemp(prefix='query_plans_')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(workdir, 'plans.db'),
+        'LOGIN_DISABLED': True,
+        'CLUSTERING_BACKGROUND': False,
+        'CLUSTERING_MODEL_DIR': os.path.join(workdir, 'clustering'),
+    })
+    with app.app_context():
+        with db.engine.begin() as connection:
+            create_base_tables(connection)
+            User.__table__.create(connection)
+            fill_synthetic(connection, rows)
+        # Same starting point as the shipped database: base tables and users
+        # in place, every later migration still to run
+        migrations = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+        stamp(directory=migrations, revision='ee9a2ed18e80')
+        upgrade(directory=migrations)
+
+        captured = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if not executemany and statement.lstrip().upper().startswith('SELECT'):
+                captured.append((statement, parameters))
+
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', capture)
+
+        client = app.test_client()
+        failures = []
+        for url in route_requests(rows):
+            if url == '/dashboard?fallback=1':
+                # Empty rollups send the dashboard down its grouped-scan path
+                with db.engine.begin() as connection:
+                    connection.execute(text("DELETE FROM dashboard_rollup"))
+            captured.clear()
+            response = client.get(url)
+            response.get_data()
+            if response.status_code != 200:
+                failures.append(f"{url}: HTTP {response.status_code}")
+                continue
+            shape = request_shape(url)
+            budget = ROUTE_STATEMENT_BUDGETS.get(shape, STATEMENT_BUDGET)
+            if len(captured) > budget:
+                failures.append(f"{url}: {len(captured)} statements (budget {budget})")
+            with db.engine.connect() as connection:
+                for statement, parameters in captured:
+                    plan = explain(connection, statement, parameters)
+                    if verbose:
+                        print(f"{url}\n  {' '.join(statement.split())[:160]}")
+                        for line in plan:
+                            print(f"    {line}")
+                    for line in plan:
+                        problem = plan_problem(shape, line)
+                        if problem:
+                            failures.append(f"{url}: {problem} in: {' '.join(statement.split())[:200]}")
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fail if a route query scans a respondent table, sorts in a temp B-tree or exceeds its statement budget.')
+    parser.add_argument('--rows', type=int, default=50000, help='synthetic respondents to generate')
+    parser.add_argument('--verbose', action='store_true', help='print every query plan')
+    args = parser.parse_args()
+
+    failures = check_plans(args.rows, verbose=args.verbose)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+    print("All route queries use an index and stay within their statement budgets.")
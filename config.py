@@ -11,7 +11,81 @@ class Config:
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # One writer connection: SQLite serialises writes anyway, and queueing
+    # them in the pool beats spinning on the file lock. Read-only views use
+    # a separate pool of query_only connections (app/database.py).
     SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_pre_ping': True,
-        'pool_recycle': 300,
+        'pool_size': 1,
+        'max_overflow': 0,
     }
+    SQLITE_READ_POOL_SIZE = 4
+
+    # Run on every new SQLite connection. WAL lets readers keep going while
+    # a write commits, and synchronous=NORMAL is safe under WAL. busy_timeout
+    # is in ms, cache_size in KiB when negative (64 MiB), mmap_size in bytes.
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'cache_size': -65536,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+    }
+
+    # Keyset pagination for the participant list and data table
+    PROFILES_PER_PAGE = 50
+    MAX_PROFILES_PER_PAGE = 200
+
+    # Logged-in users are cached per worker for this many seconds (the
+    # cache is cleared for a user on any ORM change to them)
+    USER_CACHE_TTL = 300
+    USER_CACHE_SIZE = 1024
+
+    # Respondent detail records cached per worker; any write to the
+    # respondent tables invalidates them (see app/respondents.py)
+    RESPONDENT_CACHE_TTL = 600
+    RESPONDENT_CACHE_SIZE = 5000
+
+    # Rows fetched from the cursor (and written per chunk) by /export
+    EXPORT_CHUNK_SIZE = 1000
+
+    # Clustering parameters; together with the data they form the result cache key
+    CLUSTERING_N_CLUSTERS = 3
+    CLUSTERING_SEED = 42
+
+    # Run clustering in a local process pool instead of inside the request
+    CLUSTERING_BACKGROUND = True
+    CLUSTERING_JOB_WORKERS = 2
+    # Seconds after which a still queued job is assumed lost and resubmitted
+    CLUSTERING_JOB_TIMEOUT = 600
+    # Seconds between a running job's heartbeats; a running job that misses
+    # three in a row is assumed lost with its worker and resubmitted
+    CLUSTERING_JOB_HEARTBEAT = 30
+
+    # Silhouette is O(n^2): 'exact', 'sampled', or 'auto' (exact up to the sample size)
+    CLUSTERING_SILHOUETTE_MODE = 'auto'
+    CLUSTERING_SILHOUETTE_SAMPLE_SIZE = 5000
+    # Sampled mode averages this many samples and reports a 95% interval
+    CLUSTERING_SILHOUETTE_REPEATS = 5
+
+    # 'full' refits KMeans on every computation; 'incremental' serves labels
+    # from persisted MiniBatchKMeans centroids updated by update_clusters.py
+    CLUSTERING_MODE = 'full'
+    CLUSTERING_MODEL_DIR = str(BASE_DIR / 'instance' / 'clustering')
+    CLUSTERING_BATCH_SIZE = 1024
+    # Refit when new rows are this many times further from their centroid
+    # than the rows the model was trained on
+    CLUSTERING_DRIFT_THRESHOLD = 1.5
+    CLUSTERING_REFIT_ON_DRIFT = False
+    # Fits saved by manage_models.py save go to CLUSTERING_MODEL_DIR/registry;
+    # keep this many versions per model (the pinned one is never pruned)
+    CLUSTERING_REGISTRY_KEEP = 10
+    # Pick the number of clusters per model in full mode: every k in the
+    # range is fitted in parallel on CLUSTERING_K_JOBS cores (-1 = all) and
+    # the best sampled silhouette wins
+    CLUSTERING_AUTO_K = False
+    CLUSTERING_K_RANGE = (2, 8)
+    CLUSTERING_K_JOBS = -1
+    # Scatter charts send one weighted point per distinct coordinate; cap
+    # the total per chart in case the plotted features are not discrete
+    CLUSTERING_CHART_MAX_POINTS = 2000
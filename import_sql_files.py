@@ -1,4 +1,16 @@
+import argparse
 import sqlite3
+from sqlalchemy import create_engine
+
+from app.bulk_load import bulk_load
+from app.delta_import import delta_import
+from app.maintenance import refresh_derived_data
+
+# Tables reloaded by demo.sql and profile.sql
+BULK_TABLES = ('kk_profile', 'kk_demographics')
+
+# Rows committed per batch in bulk mode
+BATCH_SIZE = 5000
 
 def execute_sql_file(db_path, sql_file_path):
     with open(sql_file_path, 'r', encoding='utf-8') as file:
@@ -20,6 +32,33 @@ if __name__ == '__main__':
     profile_sql_path = 'profile.sql'          # Your profile.sql file path
     demo_sql_path = 'demo.sql'                # Your demo.sql file path
     
+    parser = argparse.ArgumentParser(description='Load demo.sql and profile.sql into the SQLite database.')
+    parser.add_argument('--bulk', action='store_true',
+                        help='tuned pragmas, indexes rebuilt after the load, resumable batches')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--delta', action='store_true',
+                        help='apply only inserted, changed and removed respondents instead of reloading; '
+                             'the dumps must be full snapshots, since respondents missing from them are deleted')
+    args = parser.parse_args()
+
+    if args.delta:
+        # Row triggers keep the derived tables current, so no refresh is needed
+        engine = create_engine(f'sqlite:///{db_path}')
+        with engine.begin() as conn:
+            summary = delta_import(conn, [demo_sql_path, profile_sql_path], BULK_TABLES)
+        for table, counts in summary.items():
+            print(f"{table}: {counts['inserted']} inserted, {counts['updated']} updated, "
+                  f"{counts['deleted']} deleted, {counts['unchanged']} unchanged")
+        print("Per-respondent changes are listed in import_changes.")
+    else:
+        if args.bulk:
+            bulk_load(db_path, [demo_sql_path, profile_sql_path], BULK_TABLES, batch_size=args.batch_size)
+        else:
+            execute_sql_file(db_path, demo_sql_path)
+            execute_sql_file(db_path, profile_sql_path)
 
-    execute_sql_file(db_path, demo_sql_path)
-    execute_sql_file(db_path, profile_sql_path)
+        # profile.sql drops and recreates kk_profile, taking the search triggers with it
+        engine = create_engine(f'sqlite:///{db_path}')
+        with engine.begin() as conn:
+            refresh_derived_data(conn)
+        print("Derived tables refreshed.")
\ No newline at end of file
@@ -1,5 +1,10 @@
+import argparse
 import os
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine
+
+from app.bulk_load import bulk_load
+from app.maintenance import refresh_derived_data
+from app.sql_dump import load_dump
 
 # Path to your SQLite DB (adjust if needed)
 db_path = os.path.join('instance', 'youth_governance.db')
@@ -8,52 +13,65 @@ db_uri = f'sqlite:///{db_path}'
 # Path to your SQL file
 sql_file = 'kk_db.sql'
 
-def clean_sql(sql):
-    lines = []
-    for line in sql.splitlines():
-        l = line.strip()
-        # Skip MySQL-specific lines and comments
-        if (
-            l.startswith('--') or
-            l.startswith('/*!') or
-            l.startswith('LOCK TABLES') or
-            l.startswith('UNLOCK TABLES') or
-            l.startswith('COMMIT') or
-            'ENGINE=' in l or
-            'AUTO_INCREMENT' in l or
-            'UNIQUE KEY' in l or
-            'KEY ' in l or
-            l.startswith('ALTER TABLE') and ('ADD KEY' in l or 'ADD CONSTRAINT' in l)
-        ):
-            continue
-        # Remove MySQL backticks
-        line = line.replace('`', '')
-        # Replace MySQL int(11) with SQLite int
-        line = line.replace('int(11)', 'INTEGER')
-        # Replace MySQL varchar with SQLite TEXT
-        line = line.replace('varchar(', 'TEXT(')
-        lines.append(line)
-    return '\n'.join(lines)
-
-def import_sql():
+# Rows per executemany call (and per commit in bulk mode)
+BATCH_SIZE = 1000
+
+# Tables the dump reloads; their secondary indexes are dropped in bulk mode
+BULK_TABLES = ('kk_profile', 'kk_demographics', 'admin_users')
+
+def import_sql(path=sql_file, batch_size=BATCH_SIZE):
+    """Load a MySQL/phpMyAdmin dump into the SQLite database.
+
+    The dump is streamed statement by statement, MySQL DDL is translated
+    for SQLite and INSERT rows are batched. Everything, including the
+    refresh of the derived tables, runs in one transaction: on any error
+    nothing is changed.
+    """
     # Create the database file if it doesn't exist
     if not os.path.exists('instance'):
         os.makedirs('instance')
-    engine = create_engine(db_uri)
+    # AUTOCOMMIT stops the driver from opening transactions on its own,
+    # so the explicit BEGIN below also covers the DDL
+    engine = create_engine(db_uri, isolation_level='AUTOCOMMIT')
 
-    with open(sql_file, 'r', encoding='utf-8') as f:
-        sql_statements = clean_sql(f.read())
+    with engine.connect() as conn, open(path, 'r', encoding='utf-8') as f:
+        conn.exec_driver_sql('BEGIN')
+        try:
+            stats = load_dump(conn.connection.dbapi_connection, f, batch_size=batch_size)
+            refresh_derived_data(conn)
+        except Exception:
+            conn.exec_driver_sql('ROLLBACK')
+            raise
+        conn.exec_driver_sql('COMMIT')
 
-    with engine.connect() as conn:
-        for statement in sql_statements.split(';'):
-            stmt = statement.strip()
-            if stmt:
-                try:
-                    conn.execute(text(stmt))
-                except Exception as e:
-                    print(f"Error executing statement: {stmt[:100]}... \n{e}")
+    rate = stats['rows'] / stats['seconds'] if stats['seconds'] else stats['rows']
+    print(f"Imported {stats['rows']} rows from {stats['statements']} statements "
+          f"in {stats['seconds']:.2f}s ({rate:,.0f} rows/sec)")
+    print(f"Data imported to {db_path}")
 
+def bulk_import_sql(path=sql_file, batch_size=BATCH_SIZE):
+    """Load a dump in bulk-load mode (see app/bulk_load.py).
+
+    Commits every batch, so a failed load can be rerun and continues
+    where it stopped instead of starting over.
+    """
+    if not os.path.exists('instance'):
+        os.makedirs('instance')
+    bulk_load(db_path, [path], BULK_TABLES, batch_size=batch_size)
+
+    engine = create_engine(db_uri)
+    with engine.begin() as conn:
+        refresh_derived_data(conn)
     print(f"Data imported to {db_path}")
 
 if __name__ == '__main__':
-    import_sql()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Import a MySQL dump into the SQLite database.')
+    parser.add_argument('sql_file', nargs='?', default=sql_file)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--bulk', action='store_true',
+                        help='tuned pragmas, indexes rebuilt after the load, resumable batches')
+    args = parser.parse_args()
+    if args.bulk:
+        bulk_import_sql(args.sql_file, batch_size=args.batch_size)
+    else:
+        import_sql(args.sql_file, batch_size=args.batch_size)
\ No newline at end of file
@@ -0,0 +1,35 @@
+import argparse
+import time
+
+from app import create_app, db
+from app.survey_ingest import ingest
+
+# Load a KK survey export (.csv, or .xlsx with openpyxl installed) into
+# kk_profile/kk_demographics. Rows are validated in parallel; existing
+# respondents are updated and new ones inserted, one transaction per chunk.
+# Rows that fail validation are listed in the rejects file instead.
+
+
+def ingest_survey(path, workers=None, chunk_size=5000, rejects_path=None):
+    rejects_path = rejects_path or f"{path}.rejects.csv"
+    app = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        stats = ingest(db.engine, path, rejects_path, workers=workers, chunk_size=chunk_size)
+        elapsed = time.perf_counter() - started
+
+    rate = stats['rows'] / elapsed if elapsed else stats['rows']
+    print(f"Read {stats['rows']} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec): "
+          f"{stats['inserted']} inserted, {stats['updated']} updated, {stats['rejected']} rejected.")
+    if stats['rejected']:
+        print(f"Rejected rows written to {rejects_path}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import a KK survey CSV/XLSX export.')
+    parser.add_argument('path', help='survey export (.csv or .xlsx)')
+    parser.add_argument('--workers', type=int, default=None, help='validation processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='rows per validation chunk and transaction')
+    parser.add_argument('--rejects', default=None, help='rejects report path (default: <path>.rejects.csv)')
+    args = parser.parse_args()
+    ingest_survey(args.path, workers=args.workers, chunk_size=args.chunk_size, rejects_path=args.rejects)
@@ -0,0 +1,59 @@
+import argparse
+
+from app import create_app
+from app.clustering import clustering_params, compute_clustering
+from app.model_registry import MODEL_KINDS, list_models, pin, unpin
+
+# Inspect the clustering model registry and choose which versions are served.
+# While both kinds are pinned, /clustering_model predicts with the pinned
+# models instead of refitting. New versions are only added by 'save', which
+# fits both models on the current data.
+
+
+def show_models():
+    for kind in MODEL_KINDS:
+        print(f"{kind}:")
+        models = list_models(kind)
+        if not models:
+            print("  (no saved models)")
+        for meta in models:
+            # None when the model ended up with fewer than two clusters
+            silhouette = meta['metrics']['silhouette']
+            score = f"{silhouette['score']:.3f}" if silhouette is not None else '-'
+            marker = '*' if meta['pinned'] else ' '
+            print(f" {marker} {meta['version']}  k={meta['n_clusters']}  seed={meta['seed']}  "
+                  f"silhouette={score}  data={meta['fingerprint']}")
+
+
+def save_models(config):
+    # Fit as full mode would, ignoring any pins, and keep both models
+    params = clustering_params({**config, 'CLUSTERING_MODE': 'full'}, use_pinned=False)
+    compute_clustering(params, save_models=True)
+    for kind in MODEL_KINDS:
+        print(f"Saved {kind} model {list_models(kind)[0]['version']}.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Manage saved clustering models.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help='list saved versions (* marks the pinned one)')
+    sub.add_parser('save', help='fit both models on the current data and save them')
+    pin_parser = sub.add_parser('pin', help='serve a saved version')
+    pin_parser.add_argument('kind', choices=MODEL_KINDS)
+    pin_parser.add_argument('version')
+    unpin_parser = sub.add_parser('unpin', help='go back to fitting on demand')
+    unpin_parser.add_argument('kind', choices=MODEL_KINDS)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.command == 'list':
+            show_models()
+        elif args.command == 'save':
+            save_models(app.config)
+        elif args.command == 'pin':
+            pin(args.kind, args.version)
+            print(f"Pinned {args.kind} model {args.version}.")
+        else:
+            unpin(args.kind)
+            print(f"Unpinned {args.kind} model.")
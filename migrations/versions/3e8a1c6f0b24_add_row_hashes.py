@@ -0,0 +1,27 @@
+"""Add per-respondent row hashes for delta imports
+
+Revision ID: 3e8a1c6f0b24
+Revises: 7c2d9e4b1a63
+Create Date: 2026-10-18 18:21:05.318442
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.delta_import import DROP_ROW_HASH_DDL, rebuild_row_hashes
+
+
+# revision identifiers, used by Alembic.
+revision = '3e8a1c6f0b24'
+down_revision = '7c2d9e4b1a63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    rebuild_row_hashes(op.get_bind())
+
+
+def downgrade():
+    for statement in DROP_ROW_HASH_DDL:
+        op.execute(statement)
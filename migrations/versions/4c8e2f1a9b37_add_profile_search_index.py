@@ -0,0 +1,27 @@
+"""Add FTS5 search index over kk_profile
+
+Revision ID: 4c8e2f1a9b37
+Revises: ee9a2ed18e80
+Create Date: 2026-10-18 09:12:41.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.search import DROP_SEARCH_INDEX_DDL, rebuild_search_index
+
+
+# revision identifiers, used by Alembic.
+revision = '4c8e2f1a9b37'
+down_revision = 'ee9a2ed18e80'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    rebuild_search_index(op.get_bind())
+
+
+def downgrade():
+    for statement in DROP_SEARCH_INDEX_DDL:
+        op.execute(statement)
@@ -0,0 +1,37 @@
+"""Add secondary indexes for route filters and groupings
+
+Revision ID: 6d1f4a9c2e87
+Revises: 3e8a1c6f0b24
+Create Date: 2026-10-18 19:02:44.170385
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.indexes import DROP_ROUTE_INDEX_DDL
+
+# The index set as of this revision; later revisions change app.indexes
+INDEX_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_kk_profile_region ON kk_profile (Region, Respondent_No)",
+    "CREATE INDEX IF NOT EXISTS ix_kk_profile_barangay ON kk_profile (Barangay, Sex_Assigned_by_Birth, Age)",
+    "CREATE INDEX IF NOT EXISTS ix_kk_demographics_education ON kk_demographics (Educational_Background, Work_Status)",
+]
+
+
+# revision identifiers, used by Alembic.
+revision = '6d1f4a9c2e87'
+down_revision = '3e8a1c6f0b24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for statement in INDEX_DDL:
+        op.execute(statement)
+    # Give the planner row counts for the new indexes
+    op.execute("ANALYZE")
+
+
+def downgrade():
+    for statement in DROP_ROUTE_INDEX_DDL:
+        op.execute(statement)
@@ -0,0 +1,128 @@
+"""Add trigger-maintained respondent feature table
+
+Revision ID: 7c2d9e4b1a63
+Revises: f41a7c9e2d58
+Create Date: 2026-10-18 16:08:42.903517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# The feature triggers as of this revision, when kk_profile.Age was TEXT
+# and had to be all digits to count. app.feature_store now expects a typed
+# Age (8b4e2d7a1c59), so the definitions are frozen here; 8b4e2d7a1c59's
+# downgrade reinstalls them.
+EDUCATION_LEVELS = {
+    'College graduate': 3, 'College undergraduate': 3,
+    'High school graduate': 2, 'High school undergraduate': 2,
+    'Elementary graduate': 1, 'Elementary undergraduate': 1,
+}
+_VALID_AGE = "(CAST(p.Age AS TEXT) GLOB '[0-9]*' AND CAST(p.Age AS TEXT) NOT GLOB '*[^0-9]*')"
+_ATTENDED = "(d.Attended_KK_Assembly = 'Yes')"
+_VOTED = "(d.Did_you_vote_last_SK_election = 'Yes')"
+_POVERTY = "(IFNULL(d.Work_Status, '') != 'Unemployed')"
+_EDUCATION_LEVEL = "CASE d.Educational_Background {} ELSE 0 END".format(
+    ' '.join(f"WHEN '{value}' THEN {level}" for value, level in EDUCATION_LEVELS.items())
+)
+
+FEATURE_EXPRESSIONS = {
+    'age': f"CASE WHEN {_VALID_AGE} THEN CAST(p.Age AS INTEGER) ELSE 0 END",
+    'valid_age': f"IFNULL({_VALID_AGE}, 0)",
+    'attended': f"IFNULL({_ATTENDED}, 0)",
+    'voted': f"IFNULL({_VOTED}, 0)",
+    'poverty_indicator': _POVERTY,
+    'education_level': _EDUCATION_LEVEL,
+    'gender_empowerment': "IFNULL(p.Sex_Assigned_by_Birth = 'Female', 0)",
+    'civic_engagement': f"IFNULL({_ATTENDED}, 0) + IFNULL({_VOTED}, 0)",
+    'economic_participation': f"IFNULL({_ATTENDED}, 0) + IFNULL({_VOTED}, 0) + {_POVERTY}",
+}
+FEATURE_COLUMNS = list(FEATURE_EXPRESSIONS)
+
+_SELECT_FEATURES = """
+    SELECT p.Respondent_No, {expressions}
+    FROM kk_profile p JOIN kk_demographics d ON d.Respondent_No = p.Respondent_No
+""".format(expressions=', '.join(FEATURE_EXPRESSIONS[name] for name in FEATURE_COLUMNS))
+
+_UPSERT_FEATURES = f"INSERT OR REPLACE INTO respondent_features (Respondent_No, {', '.join(FEATURE_COLUMNS)})"
+
+FEATURE_INDEX_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_kk_profile_respondent_no ON kk_profile (Respondent_No)",
+    "CREATE INDEX IF NOT EXISTS ix_kk_demographics_respondent_no ON kk_demographics (Respondent_No)",
+]
+
+
+def _triggers(table, columns):
+    refresh_new = f"{_UPSERT_FEATURES} {_SELECT_FEATURES} WHERE p.Respondent_No = new.Respondent_No;"
+    delete_old = "DELETE FROM respondent_features WHERE Respondent_No = old.Respondent_No;"
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_features_ai AFTER INSERT ON {table} BEGIN
+            {refresh_new}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_features_ad AFTER DELETE ON {table} BEGIN
+            {delete_old}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_features_au AFTER UPDATE OF {', '.join(columns)} ON {table} BEGIN
+            {delete_old}
+            {refresh_new}
+        END
+        """,
+    ]
+
+
+FEATURE_STORE_DDL = FEATURE_INDEX_DDL + _triggers(
+    'kk_profile', ['Respondent_No', 'Age', 'Sex_Assigned_by_Birth']
+) + _triggers(
+    'kk_demographics', ['Respondent_No', 'Work_Status', 'Educational_Background',
+                        'Attended_KK_Assembly', 'Did_you_vote_last_SK_election']
+)
+
+DROP_FEATURE_STORE_DDL = [
+    f"DROP TRIGGER IF EXISTS {table}_features_{event}"
+    for table in ('kk_profile', 'kk_demographics')
+    for event in ('ai', 'ad', 'au')
+] + [
+    "DROP INDEX IF EXISTS ix_kk_demographics_respondent_no",
+    "DROP INDEX IF EXISTS ix_kk_profile_respondent_no",
+]
+
+
+def rebuild_feature_store(connection):
+    for statement in FEATURE_STORE_DDL:
+        connection.execute(sa.text(statement))
+    connection.execute(sa.text("DELETE FROM respondent_features"))
+    connection.execute(sa.text(f"{_UPSERT_FEATURES} {_SELECT_FEATURES}"))
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2d9e4b1a63'
+down_revision = 'f41a7c9e2d58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('respondent_features',
+    sa.Column('Respondent_No', sa.String(length=14), nullable=False),
+    sa.Column('age', sa.Integer(), nullable=False),
+    sa.Column('valid_age', sa.Integer(), nullable=False),
+    sa.Column('attended', sa.Integer(), nullable=False),
+    sa.Column('voted', sa.Integer(), nullable=False),
+    sa.Column('poverty_indicator', sa.Integer(), nullable=False),
+    sa.Column('education_level', sa.Integer(), nullable=False),
+    sa.Column('gender_empowerment', sa.Integer(), nullable=False),
+    sa.Column('civic_engagement', sa.Integer(), nullable=False),
+    sa.Column('economic_participation', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('Respondent_No')
+    )
+    rebuild_feature_store(op.get_bind())
+
+
+def downgrade():
+    for statement in DROP_FEATURE_STORE_DDL:
+        op.execute(statement)
+    op.drop_table('respondent_features')
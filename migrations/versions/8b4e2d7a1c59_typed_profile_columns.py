@@ -0,0 +1,72 @@
+"""Store kk_profile Age/Date/Birthday typed and add age_bucket
+
+Revision ID: 8b4e2d7a1c59
+Revises: 6d1f4a9c2e87
+Create Date: 2026-10-18 19:47:12.604118
+
+"""
+from alembic import context, op
+from alembic.script import ScriptDirectory
+import sqlalchemy as sa
+
+from app.data_version import bump_data_version
+from app.delta_import import rebuild_row_hashes
+from app.maintenance import refresh_derived_data
+from app.profile_schema import untype_profile
+from app.search import rebuild_search_index
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4e2d7a1c59'
+down_revision = '6d1f4a9c2e87'
+branch_labels = None
+depends_on = None
+
+# Rollup and feature triggers from 9a5d3e7c1f20 / 7c2d9e4b1a63 compute on a
+# TEXT Age. The kk_demographics ones survive the table rebuild, so all of
+# them are dropped for refresh_derived_data to install the typed versions.
+AGE_TRIGGERS = [
+    f"{table}_{kind}_{event}"
+    for table in ('kk_profile', 'kk_demographics')
+    for kind in ('rollup', 'features')
+    for event in ('ai', 'ad', 'au')
+]
+
+
+def upgrade():
+    for name in AGE_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    # 6d1f4a9c2e87's barangay index is on Age; the rebuild would carry it
+    # over and the IF NOT EXISTS in app.indexes keep it, so it goes first
+    op.execute("DROP INDEX IF EXISTS ix_kk_profile_barangay")
+    # Rebuilds kk_profile typed (retype_profile), then puts back the
+    # triggers and indexes that went with the old table
+    refresh_derived_data(op.get_bind())
+    op.execute("ANALYZE")
+
+
+def _revision_module(revision):
+    # An earlier migration file, for the definitions it froze
+    return ScriptDirectory.from_config(context.config).get_revision(revision).module
+
+
+def downgrade():
+    bind = op.get_bind()
+    # The age_bucket barangay index is skipped by the rebuild; 6d1f4a9c2e87's
+    # Age version is created below
+    op.execute("DROP INDEX IF EXISTS ix_kk_profile_barangay")
+    untype_profile(bind)
+    # Back to what 6d1f4a9c2e87 left on the TEXT table: triggers on
+    # kk_profile went with the typed one, the typed rollup and feature
+    # triggers on kk_demographics are replaced, and everything keyed by
+    # kk_profile.rowid (the search index) is rebuilt
+    for name in AGE_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    rebuild_search_index(bind)
+    _revision_module('9a5d3e7c1f20').rebuild_rollups(bind)
+    _revision_module('7c2d9e4b1a63').rebuild_feature_store(bind)
+    rebuild_row_hashes(bind)
+    bump_data_version(bind)
+    for statement in _revision_module('6d1f4a9c2e87').INDEX_DDL:
+        op.execute(statement)
+    op.execute("ANALYZE")
@@ -0,0 +1,126 @@
+"""Add incrementally maintained dashboard rollup table
+
+Revision ID: 9a5d3e7c1f20
+Revises: 4c8e2f1a9b37
+Create Date: 2026-10-18 10:03:17.551982
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# The rollup table and triggers as of this revision, when kk_profile.Age
+# was TEXT. app.rollups now expects a typed Age (8b4e2d7a1c59), so the
+# definitions are frozen here; 8b4e2d7a1c59's downgrade reinstalls them.
+AGE_GROUP_BOUNDS = [('15-17', 15, 17), ('18-21', 18, 21), ('22-24', 22, 24), ('25-30', 25, 30)]
+_AGE_GROUP = "CASE {} ELSE NULL END".format(' '.join(
+    f"WHEN CAST({{row}}.Age AS INTEGER) BETWEEN {low} AND {high} THEN '{group}'"
+    for group, low, high in AGE_GROUP_BOUNDS
+))
+
+PROFILE_DIMENSIONS = {
+    'barangay': "IFNULL({row}.Barangay, '')",
+    'sex': "IFNULL({row}.Sex_Assigned_by_Birth, '')",
+    'age_group': _AGE_GROUP,
+}
+
+DEMOGRAPHIC_DIMENSIONS = {
+    'education': "IFNULL({row}.Educational_Background, '')",
+    'work_status': "IFNULL({row}.Work_Status, '')",
+}
+
+ROLLUP_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS dashboard_rollup (
+        dimension VARCHAR(20) NOT NULL,
+        value VARCHAR(100) NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (dimension, value)
+    )
+"""
+
+
+def _dimension_rows(dimensions, row):
+    return ' UNION ALL '.join(
+        f"SELECT '{name}' AS dimension, {expression.format(row=row)} AS value"
+        for name, expression in dimensions.items()
+    )
+
+
+def _increment(dimensions, row):
+    return f"""
+        INSERT INTO dashboard_rollup (dimension, value, count)
+        SELECT dimension, value, 1 FROM ({_dimension_rows(dimensions, row)}) WHERE value IS NOT NULL
+        ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+    """
+
+
+def _decrement(dimensions, row):
+    return f"""
+        UPDATE dashboard_rollup SET count = count - 1
+        WHERE (dimension, value) IN (SELECT dimension, value FROM ({_dimension_rows(dimensions, row)}));
+        DELETE FROM dashboard_rollup WHERE count <= 0;
+    """
+
+
+def _triggers(table, dimensions, columns):
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_rollup_ai AFTER INSERT ON {table} BEGIN
+            {_increment(dimensions, 'new')}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_rollup_ad AFTER DELETE ON {table} BEGIN
+            {_decrement(dimensions, 'old')}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_rollup_au AFTER UPDATE OF {', '.join(columns)} ON {table} BEGIN
+            {_decrement(dimensions, 'old')}
+            {_increment(dimensions, 'new')}
+        END
+        """,
+    ]
+
+
+ROLLUP_DDL = [ROLLUP_TABLE_DDL] + _triggers(
+    'kk_profile', PROFILE_DIMENSIONS, ['Barangay', 'Sex_Assigned_by_Birth', 'Age']
+) + _triggers(
+    'kk_demographics', DEMOGRAPHIC_DIMENSIONS, ['Educational_Background', 'Work_Status']
+)
+
+DROP_ROLLUP_DDL = [
+    f"DROP TRIGGER IF EXISTS {table}_rollup_{event}"
+    for table in ('kk_profile', 'kk_demographics')
+    for event in ('ai', 'ad', 'au')
+] + ["DROP TABLE IF EXISTS dashboard_rollup"]
+
+
+def rebuild_rollups(connection):
+    for statement in ROLLUP_DDL:
+        connection.execute(sa.text(statement))
+    connection.execute(sa.text("DELETE FROM dashboard_rollup"))
+    for table, dimensions in (('kk_profile', PROFILE_DIMENSIONS), ('kk_demographics', DEMOGRAPHIC_DIMENSIONS)):
+        for name, expression in dimensions.items():
+            value = expression.format(row=table)
+            connection.execute(sa.text(f"""
+                INSERT INTO dashboard_rollup (dimension, value, count)
+                SELECT '{name}', {value}, COUNT(*) FROM {table}
+                WHERE {value} IS NOT NULL
+                GROUP BY {value}
+            """))
+
+
+# revision identifiers, used by Alembic.
+revision = '9a5d3e7c1f20'
+down_revision = '4c8e2f1a9b37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    rebuild_rollups(op.get_bind())
+
+
+def downgrade():
+    for statement in DROP_ROLLUP_DDL:
+        op.execute(statement)
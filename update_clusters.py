@@ -0,0 +1,34 @@
+import argparse
+
+from app import create_app
+from app.incremental import refit, update
+
+# Run after each import: respondents without a cluster are assigned from the
+# persisted centroids, which are then updated with just those rows.
+# Respondents whose data changed are reassigned, removed ones dropped.
+
+
+def update_clusters(force_refit=False):
+    app = create_app()
+    with app.app_context():
+        n_clusters = app.config['CLUSTERING_N_CLUSTERS']
+        seed = app.config['CLUSTERING_SEED']
+        if force_refit:
+            result = refit(n_clusters, seed)
+        else:
+            result = update(n_clusters, seed)
+
+    action = "Refit models and assigned" if result['refit'] else "Assigned"
+    print(f"{action} {result['assigned']} respondents.")
+    if result['reassigned'] or result['removed']:
+        print(f"Reassigned {result['reassigned']} changed and removed {result['removed']} deleted respondents.")
+    if result['drift']:
+        print("Drift (new rows vs. training distance): " +
+              ", ".join(f"{kind} {ratio:.2f}x" for kind, ratio in result['drift'].items()))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Incrementally update KK cluster assignments.')
+    parser.add_argument('--refit', action='store_true', help='refit both models from scratch')
+    args = parser.parse_args()
+    update_clusters(force_refit=args.refit)
@@ -0,0 +1,26 @@
+import argparse
+import time
+
+from app import create_app
+from app.recommendations import assign_recommendations
+
+# Run after each import: every respondent gets an SDG program recommendation
+# from the compiled rule table, stored in respondent_recommendation
+
+
+def update_recommendations(seed=None):
+    app = create_app()
+    with app.app_context():
+        if seed is None:
+            seed = app.config['CLUSTERING_SEED']
+        start = time.perf_counter()
+        count = assign_recommendations(seed)
+        elapsed = time.perf_counter() - start
+    print(f"Stored recommendations for {count} respondents in {elapsed:.2f}s.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Assign SDG recommendations to every respondent.')
+    parser.add_argument('--seed', type=int, help='changes which of the equally ranked picks each respondent gets')
+    args = parser.parse_args()
+    update_recommendations(seed=args.seed)